@@ -162,6 +162,32 @@ _wLLVMGetBitcodeFromModule(PyObject *self, PyObject *args)
     return ret;
 }
 
+static PyObject *
+_wLLVMLinkModules(PyObject *self, PyObject *args)
+{
+    PyObject *obj1, *obj2, *ret;
+    LLVMModuleRef dest, src;
+    char *outmsg;
+
+    if (!PyArg_ParseTuple(args, "OO", &obj1, &obj2))
+        return NULL;
+
+    dest = (LLVMModuleRef) PyCObject_AsVoidPtr(obj1);
+    src  = (LLVMModuleRef) PyCObject_AsVoidPtr(obj2);
+
+    outmsg = 0;
+    if (!LLVMLinkModules(dest, src, &outmsg)) {
+        if (outmsg) {
+            ret = PyString_FromString(outmsg);
+            LLVMDisposeMessage(outmsg);
+            return ret;
+        }
+    }
+
+    /* note: success => None, failure => string with error message */
+    Py_RETURN_NONE;
+}
+
 /*===----------------------------------------------------------------------===*/
 /* Types                                                                      */
 /*===----------------------------------------------------------------------===*/
@@ -1011,6 +1037,7 @@ static PyMethodDef core_methods[] = {
     _method( LLVMGetModuleFromAssembly )
     _method( LLVMGetModuleFromBitcode )
     _method( LLVMGetBitcodeFromModule )
+    _method( LLVMLinkModules )
     _method( LLVMModuleGetPointerSize )
     _method( LLVMModuleGetOrInsertFunction )
 
@@ -968,6 +968,20 @@ class Module(llvm.Ownable):
         return wrapiter(_core.LLVMGetFirstFunction, 
             _core.LLVMGetNextFunction, self.ptr, Function, [self])
 
+    def link_in(self, other):
+        """Link another module into this one.
+
+        All functions, global variables and type names of `other' are
+        added to this module; declarations are resolved against the
+        definitions of the other module. `other' itself is not changed.
+        Raises `llvm.LLVMException' on any error, for example if both
+        modules define the same symbol."""
+
+        check_is_module(other)
+        ret = _core.LLVMLinkModules(self.ptr, other.ptr)
+        if ret:
+            raise llvm.LLVMException, ret
+
     def verify(self):
         """Verify module.
 
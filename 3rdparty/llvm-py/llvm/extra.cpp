@@ -53,6 +53,7 @@
 #include "llvm/IntrinsicInst.h"
 #include "llvm/Analysis/Verifier.h"
 #include "llvm/Assembly/Parser.h"
+#include "llvm/Linker.h"
 #include "llvm/System/DynamicLibrary.h"
 #include "llvm/PassManager.h"
 #include "llvm/Analysis/LoopPass.h"
@@ -357,6 +358,26 @@ unsigned char *LLVMGetBitcodeFromModule(LLVMModuleRef module, unsigned *lenp)
     return bytes;
 }
 
+/* Return 0 on failure (with errmsg filled in), 1 on success. */
+unsigned LLVMLinkModules(LLVMModuleRef dest, LLVMModuleRef src, char **errmsg)
+{
+    assert(errmsg);
+
+    llvm::Module *destp = llvm::unwrap(dest);
+    llvm::Module *srcp = llvm::unwrap(src);
+    assert(destp);
+    assert(srcp);
+
+    /* Note: the LLVM API returns true on failure. */
+    std::string msg;
+    if (llvm::Linker::LinkModules(destp, srcp, &msg)) {
+        *errmsg = strdup(msg.c_str());
+        return 0;
+    }
+
+    return 1;
+}
+
 /* Return 0 on failure (with errmsg filled in), 1 on success. */
 unsigned LLVMLoadLibraryPermanently(const char* filename, char **errmsg)
 {
@@ -131,6 +131,11 @@ LLVMModuleRef LLVMGetModuleFromBitcode(const char *bc, unsigned bclen,
  * for the given module. NULL on error. */
 unsigned char *LLVMGetBitcodeFromModule(LLVMModuleRef module, unsigned *len);
 
+/* Wraps llvm::Linker::LinkModules(). Links `src' into `dest'; `src' is not
+ * changed. Returns 0 on failure (with errmsg filled in) and 1 on success.
+ * Dispose error message after use, via LLVMDisposeMessage(). */
+unsigned LLVMLinkModules(LLVMModuleRef dest, LLVMModuleRef src, char **errmsg);
+
 /* Wraps llvm::sys::DynamicLibrary::LoadLibraryPermanently(). Returns 0 on
  * failure (with errmsg filled in) and 1 on success. Dispose error message after
  * use, via LLVMDisposeMessage(). */
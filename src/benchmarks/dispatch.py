@@ -0,0 +1,162 @@
+#!/usr/bin/python
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# measures the overhead of ASTWalker._dispatch per visited node
+#
+# A module is generated with generate.py and parsed. A walker whose handlers do nothing visits all nodes the real
+# walkers visit, so the measured time is the dispatch itself: the table lookup, the argument extractor and the
+# bookkeeping of _nodes. The time of a plain method call per node is subtracted. All nodes are measured on their first
+# and on a repeated visit, separately for the node types whose arguments are cached, like function definitions, and
+# for all other types; only the repeated visits of the cached types can profit from the cache.
+#
+# usage: dispatch.py [-n RUNS] [generator options]
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+import generate
+
+
+compilerDir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'compiler'))
+sys.path.insert(0, compilerDir)
+
+from tree import Tree
+from astwalker import ASTWalker
+from source2ast import sourcecode2AST
+
+
+
+class NullWalker(ASTWalker):
+	''' collects the nodes a walker visits; all handlers are replaced by _ignore after that '''
+	def __init__(self):
+		ASTWalker.__init__(self)
+		self.visited = []
+
+
+	def _collect(self, ast, *args):
+		self.visited.append(ast)
+
+		for x in args:
+			if isinstance(x, Tree):
+				x = [x]
+			elif not isinstance(x, list):
+				continue
+
+			for y in x:
+				# names are arguments, too, but they are not dispatched
+				if y.type in self._dispatchTable:
+					self._dispatch(y)
+
+
+	def _ignore(self, ast, *args):
+		pass
+
+
+	def collect(self, ast):
+		''' returns all nodes visited when walking ast; the nodes are in the order of their first visit '''
+		for handlerName, extractor, cached in self._dispatchTable.itervalues():
+			setattr(self, handlerName, self._collect)
+		self._dispatch(ast)
+
+		for handlerName, extractor, cached in self._dispatchTable.itervalues():
+			setattr(self, handlerName, self._ignore)
+
+		return self.visited
+
+
+
+def timePass(f, nodes):
+	t = time.time()
+	for x in nodes:
+		f(x)
+	return time.time() - t
+
+
+def clearCache(nodes):
+	for x in nodes:
+		try:
+			del x.dispatchArgs
+		except AttributeError:
+			pass
+
+
+def main():
+	op = OptionParser()
+	op.add_option('-n', help='number of runs; the minimum time is reported', dest='runs', default=10, type='int')
+	generate.addOptions(op)
+	options, args = op.parse_args()
+
+	generatorOptions = {}
+	for k in generate.defaults:
+		generatorOptions[k] = getattr(options, k)
+	source = generate.generateModule('main', [], generatorOptions)
+
+	numErrors, ast = sourcecode2AST(source)
+	if numErrors:
+		raise RuntimeError('the generated module has syntax errors')
+
+	walker = NullWalker()
+	nodes = walker.collect(ast)
+
+	cachedNodes = []
+	otherNodes = []
+	for x in nodes:
+		if walker._dispatchTable[x.type][2]:
+			cachedNodes.append(x)
+		else:
+			otherNodes.append(x)
+
+	print '%d lines, %d visited nodes, %d of them with cached arguments' % (source.count('\n') + 1, len(nodes), len(cachedNodes))
+	print
+	print '%-24s %10s %10s %10s' % ('nodes', 'call [ns]', 'first [ns]', 'again [ns]')
+	for name, l in [('cached types', cachedNodes), ('other types', otherNodes)]:
+		if not l:
+			continue
+
+		baseline = []
+		first = []
+		repeated = []
+		for i in range(options.runs):
+			clearCache(l)
+			baseline.append(timePass(walker._ignore, l))
+			first.append(timePass(walker._dispatch, l))
+			repeated.append(timePass(walker._dispatch, l))
+
+		# per node; the dispatch times do not include the method call
+		n = len(l)
+		t0 = min(baseline)
+		print '%-24s %10.0f %10.0f %10.0f' % (name, t0 / n * 1e9, (min(first) - t0) / n * 1e9, (min(repeated) - t0) / n * 1e9)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,225 @@
+#!/usr/bin/python
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# generates large synthetic programs to stress the compiler
+#
+# A program consists of main.es and a graph of imported modules: main imports every module of the first level, and
+# every module of a level imports every module of the next level, so the graph is both wide and deep and contains
+# many diamonds. Every module has many functions with deeply nested blocks and expressions, a set of overloads and
+# some structs. All generated programs compile and run; main returns 0.
+#
+# usage: generate.py [options] directory
+
+import os
+from optparse import OptionParser
+
+
+# keyword arguments of generateProgram and their defaults
+defaults = {
+	'functions': 100, # per module
+	'nesting': 4, # depth of nested blocks
+	'expressionDepth': 6,
+	'importWidth': 2, # modules per level
+	'importDepth': 2, # levels of imported modules
+	'overloads': 4, # per module
+	'structs': 10, # per module
+	}
+
+
+
+def _expression(depth, i):
+	''' returns an int32 expression of the given depth using the variables x, y and r '''
+	if depth == 0:
+		return 'xyr'[i % 3]
+
+	op = '+-*'[(depth + i) % 3]
+	if i % 2:
+		return '(%s %s %s)' % (_expression(depth - 1, i + 1), op, 'xyr'[depth % 3])
+	return '(%d %s %s)' % (depth, op, _expression(depth - 1, i + 1))
+
+
+def _block(lines, depth, maxDepth, expressionDepth, i):
+	''' appends nested blocks to lines; every level is an if, for or while statement '''
+	indent = '\t' * (depth + 1)
+	if depth == maxDepth:
+		lines.append('%sr = %s %% 1000;' % (indent, _expression(expressionDepth, i)))
+		return
+
+	kind = (depth + i) % 3
+	if kind == 0:
+		lines.append('%sif x > %d' % (indent, depth))
+	elif kind == 1:
+		lines.append('%sfor i%d in range(2)' % (indent, depth))
+	else:
+		lines.append('%sc%d = 0;' % (indent, depth))
+		lines.append('%swhile c%d < 2' % (indent, depth))
+
+	lines.append('%s{' % indent)
+	if kind == 2:
+		lines.append('%s\tc%d += 1;' % (indent, depth))
+	lines.append('%s\tr += %d;' % (indent, depth))
+	_block(lines, depth + 1, maxDepth, expressionDepth, i)
+	lines.append('%s}' % indent)
+
+	if kind == 0:
+		lines.append('%selse' % indent)
+		lines.append('%s{' % indent)
+		lines.append('%s\tr -= 1;' % indent)
+		lines.append('%s}' % indent)
+
+
+def generateModule(name, imports, options):
+	''' returns the source of a module; all global names are prefixed with the module name, so modules can be imported together '''
+	lines = ['module %s' % name, '']
+	for x in imports:
+		lines.append('from .%s import *' % x)
+	lines.append('')
+
+	for i in range(options['structs']):
+		lines.append('struct %s_S%d' % (name, i))
+		lines.append('{')
+		lines.append('\ta, b as int32;')
+		lines.append('\tc as float64;')
+		lines.append('\tnext as %s_S%d*;' % (name, i))
+		lines.append('}')
+		lines.append('')
+
+		lines.append('def %s_useS%d(v as int32) as int32' % (name, i))
+		lines.append('{')
+		lines.append('\ts as %s_S%d;' % (name, i))
+		lines.append('\ts.a = v;')
+		lines.append('\ts.b = v * 2;')
+		lines.append('\ts.c = 0.5;')
+		lines.append('\ts.next = None;')
+		lines.append('\treturn s.a + s.b;')
+		lines.append('}')
+		lines.append('')
+
+	# overloads differ in the number of parameters
+	for i in range(options['overloads']):
+		params = ', '.join(['p%d as int32' % j for j in range(i + 1)])
+		lines.append('def %s_over(%s) as int32' % (name, params))
+		lines.append('{')
+		lines.append('\treturn %s;' % ' + '.join(['p%d' % j for j in range(i + 1)]))
+		lines.append('}')
+		lines.append('')
+
+	for i in range(options['functions']):
+		lines.append('def %s_f%d(x as int32, y as int32) as int32' % (name, i))
+		lines.append('{')
+		lines.append('\tr = 0;')
+		_block(lines, 0, options['nesting'], options['expressionDepth'], i)
+
+		# calls to other functions of this module and of the imported modules
+		if i > 0:
+			lines.append('\tr += %s_f%d(y, x) %% 7;' % (name, i - 1))
+		if options['overloads']:
+			n = i % options['overloads'] + 1
+			lines.append('\tr += %s_over(%s);' % (name, ', '.join(['x'] * n)))
+		if options['structs']:
+			lines.append('\tr += %s_useS%d(y);' % (name, i % options['structs']))
+		if imports and i == 0:
+			for x in imports:
+				lines.append('\tr += %s_f%d(x, y) %% 7;' % (x, options['functions'] - 1))
+
+		lines.append('\treturn r;')
+		lines.append('}')
+		lines.append('')
+
+	return '\n'.join(lines)
+
+
+def generateProgram(directory, **kwargs):
+	''' writes main.es and all modules it imports to directory; returns a list of all filenames, main.es first '''
+	options = dict(defaults)
+	for k, v in kwargs.iteritems():
+		if k not in options:
+			raise TypeError('unknown option: %s' % k)
+		options[k] = v
+	assert(options['functions'] > 0)
+
+	levels = []
+	for i in range(options['importDepth']):
+		levels.append(['l%d_m%d' % (i, j) for j in range(options['importWidth'])])
+	levels.append([])
+
+	modules = [('main', levels[0])]
+	for i in range(options['importDepth']):
+		for x in levels[i]:
+			modules.append((x, levels[i + 1]))
+
+	filenames = []
+	for name, imports in modules:
+		source = generateModule(name, imports, options)
+		if name == 'main':
+			source += '\ndef main() as int32\n{\n\tr = main_f%d(1, 2);\n\treturn 0;\n}\n' % (options['functions'] - 1)
+
+		fn = os.path.join(directory, name + '.es')
+		f = file(fn, 'wt')
+		f.write(source)
+		f.close()
+		filenames.append(fn)
+
+	return filenames
+
+
+def addOptions(op):
+	''' adds an option for every keyword argument of generateProgram to an OptionParser '''
+	op.add_option('--functions', help='functions per module', dest='functions', default=defaults['functions'], type='int')
+	op.add_option('--nesting', help='depth of nested blocks', dest='nesting', default=defaults['nesting'], type='int')
+	op.add_option('--expression-depth', help='depth of nested expressions', dest='expressionDepth', default=defaults['expressionDepth'], type='int')
+	op.add_option('--import-width', help='imported modules per level', dest='importWidth', default=defaults['importWidth'], type='int')
+	op.add_option('--import-depth', help='levels of imported modules', dest='importDepth', default=defaults['importDepth'], type='int')
+	op.add_option('--overloads', help='overloaded functions per module', dest='overloads', default=defaults['overloads'], type='int')
+	op.add_option('--structs', help='structs per module', dest='structs', default=defaults['structs'], type='int')
+
+
+def main():
+	op = OptionParser()
+	op.set_usage('Usage: %prog [options] directory')
+	addOptions(op)
+	options, args = op.parse_args()
+
+	if len(args) != 1:
+		op.error('expected exactly one directory')
+	if not os.path.isdir(args[0]):
+		os.makedirs(args[0])
+
+	kwargs = {}
+	for k in defaults:
+		kwargs[k] = getattr(options, k)
+
+	for x in generateProgram(args[0], **kwargs):
+		print x
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,219 @@
+#!/usr/bin/python
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# measures the shootout benchmarks of src/tests/2000_shootout against their C references
+#
+# Every benchmark is compiled at every optimization level of the compiler (and once more with --lto), translated to
+# native code by llc and run several times after some warmup runs. The C reference is compiled by the C compiler.
+# All programs return a checksum as exit code, so a benchmark fails when its exit code differs from the C reference.
+#
+# The script fails when the ratio of the times of the generated code and the C reference exceeds --max-ratio. This
+# check only applies to the optimized configurations: -O0 code is expected to be many times slower than the C
+# reference compiled with -O2. With a baseline from an earlier run (--baseline) it also fails when any ratio grew by
+# more than the threshold; this applies to all configurations.
+#
+# usage: shootout.py [-n RUNS] [--warmup RUNS] [--json FILE] [--max-ratio RATIO] [--baseline FILE] [--threshold FRACTION]
+#        [benchmark ...]
+
+import os
+import sys
+import imp
+import time
+import json
+import shutil
+import tempfile
+import subprocess
+from optparse import OptionParser
+
+
+srcDir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+compilerDir = os.path.join(srcDir, 'compiler')
+exoself = os.path.join(compilerDir, 'exoself')
+shootoutDir = os.path.join(srcDir, 'tests', '2000_shootout')
+
+# the same search paths as configured by the top level wscript
+searchPaths = [os.path.join(srcDir, 'runtime'), srcDir]
+
+benchmarks = ['binarytrees', 'fannkuchredux', 'fasta', 'fibonacci', 'mandelbrot', 'nbody', 'spectralnorm']
+
+# the exoself versions have no command line arguments, yet; these are the values they use
+cArguments = {'nbody': ['50000000']}
+
+
+
+def getConfigurations():
+	''' returns a list of (name, compiler options) for all optimization levels of the compiler '''
+	sys.path.insert(0, compilerDir) # setuppaths expects the compiler directory in front of sys.path
+	driver = imp.load_source('exoself_driver', exoself)
+	del sys.path[0]
+
+	levels = sorted(driver.optPasses)
+
+	configurations = []
+	for x in levels:
+		configurations.append(('-O%d' % x, ['-O%d' % x]))
+	configurations.append(('-O%d --lto' % levels[-1], ['-O%d' % levels[-1], '--lto']))
+	return configurations
+
+
+def run(args, cwd=None):
+	''' runs a command and raises an exception if it fails '''
+	p = subprocess.Popen(args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+	out = p.communicate()[0]
+	if p.returncode:
+		raise RuntimeError('%s failed:\n%s' % (' '.join(args), out))
+
+
+def buildC(options, name, tmpDir):
+	exe = os.path.join(tmpDir, '%s_c' % name)
+	run([options.cc] + options.cflags.split() + ['-o', exe, os.path.join(shootoutDir, name + '.c'), '-lm'])
+	return exe
+
+
+def buildES(options, name, configName, compilerOptions, tmpDir):
+	base = os.path.join(tmpDir, '%s%s' % (name, configName.replace(' ', '').replace('-', '_')))
+
+	args = [options.python, exoself, '--link'] + compilerOptions
+	for x in searchPaths:
+		args.extend(['-I', x])
+	args.extend(['-o', base + '.bc', os.path.join(shootoutDir, name + '.es')])
+	run(args)
+
+	run([options.llc, '-f', '-o', base + '.s', base + '.bc'])
+	run([options.cc, '-o', base, base + '.s', '-lm'])
+	return base
+
+
+def timeExecutable(args, warmup, runs):
+	''' returns (exit code, list of wall clock times) '''
+	devNull = file(os.devnull, 'w')
+
+	for i in range(warmup):
+		subprocess.call(args, stdout=devNull, stderr=devNull)
+
+	times = []
+	status = None
+	for i in range(runs):
+		t = time.time()
+		status = subprocess.call(args, stdout=devNull, stderr=devNull)
+		times.append(time.time() - t)
+
+	devNull.close()
+	return status, times
+
+
+def median(l):
+	l = sorted(l)
+	return l[len(l) / 2]
+
+
+def measure(args, options):
+	status, times = timeExecutable(args, options.warmup, options.runs)
+	return {'exitCode': status, 'min': min(times), 'median': median(times)}
+
+
+def main():
+	op = OptionParser()
+	op.set_usage('Usage: %prog [options] [benchmark [...]]')
+	op.add_option('-n', help='number of measured runs per executable', dest='runs', default=5, type='int')
+	op.add_option('--warmup', help='number of runs before measuring', dest='warmup', default=1, type='int')
+	op.add_option('--json', help='write the results to a JSON file; it can be used as baseline later', dest='jsonFilename', default=None)
+	op.add_option('--max-ratio', help='fail if the optimized generated code (all configurations except -O0) is slower than the C reference by more than this factor; 0 disables the check (default: 10)', dest='maxRatio', default=10.0, type='float')
+	op.add_option('--baseline', help='JSON file of an earlier run; fail if a ratio to the C reference got worse', dest='baseline', default=None)
+	op.add_option('--threshold', help='allowed relative growth of the ratio to the C reference compared to the baseline', dest='threshold', default=0.1, type='float')
+	op.add_option('--python', help='python interpreter used to run the compiler', dest='python', default=sys.executable)
+	op.add_option('--cc', help='C compiler', dest='cc', default='gcc')
+	op.add_option('--cflags', help='flags for the C references', dest='cflags', default='-O2')
+	op.add_option('--llc', help='llc used to create native code', dest='llc', default='llc')
+	options, args = op.parse_args()
+
+	for x in args:
+		if x not in benchmarks:
+			op.error('unknown benchmark: %s' % x)
+	if not args:
+		args = benchmarks
+	if options.runs < 1:
+		op.error('-n needs a positive number of runs')
+
+	baseline = None
+	if options.baseline:
+		f = file(options.baseline, 'rt')
+		baseline = json.load(f)['benchmarks']
+		f.close()
+
+	configurations = getConfigurations()
+
+	results = {}
+	failures = []
+	tmpDir = tempfile.mkdtemp()
+	try:
+		print '%-16s %-14s %12s %12s %8s' % ('benchmark', 'compiler', 'min [s]', 'median [s]', 'ratio')
+		for name in args:
+			r = results[name] = {}
+
+			c = r['c'] = measure([buildC(options, name, tmpDir)] + cArguments.get(name, []), options)
+			print '%-16s %-14s %12.3f %12.3f' % (name, 'C ' + options.cflags, c['min'], c['median'])
+
+			for configName, compilerOptions in configurations:
+				m = r[configName] = measure([buildES(options, name, configName, compilerOptions, tmpDir)], options)
+				m['ratio'] = m['min'] / c['min']
+
+				notes = []
+				if m['exitCode'] != c['exitCode']:
+					notes.append('wrong result: exit code %s instead of %s' % (m['exitCode'], c['exitCode']))
+					failures.append((name, configName))
+				elif options.maxRatio and '-O0' not in compilerOptions and m['ratio'] > options.maxRatio:
+					notes.append('too slow: ratio %.2f > %.2f' % (m['ratio'], options.maxRatio))
+					failures.append((name, configName))
+				elif baseline and configName in baseline.get(name, {}):
+					allowed = baseline[name][configName]['ratio'] * (1 + options.threshold)
+					if m['ratio'] > allowed:
+						notes.append('regression: ratio %.2f > %.2f' % (m['ratio'], allowed))
+						failures.append((name, configName))
+
+				print '%-16s %-14s %12.3f %12.3f %8.2f %s' % ('', configName, m['min'], m['median'], m['ratio'], '; '.join(notes))
+	finally:
+		shutil.rmtree(tmpDir)
+
+	if options.jsonFilename:
+		f = file(options.jsonFilename, 'wt')
+		json.dump({'runs': options.runs, 'warmup': options.warmup, 'cflags': options.cflags, 'benchmarks': results}, f, indent=1, sort_keys=True)
+		f.close()
+
+	if failures:
+		print
+		print '%d failures: %s' % (len(failures), ', '.join(['%s %s' % x for x in failures]))
+		return 1
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
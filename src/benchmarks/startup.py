@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# measures the startup time of the compiler
+#
+# Every mode is measured as the wall clock time from starting the compiler process until it exits. For -A and
+# --save-dependencies nearly all of this time is startup, so it approximates the time until the first byte is parsed.
+# The import times of the heavy modules are measured in a separate process.
+#
+# usage: startup.py [-n RUNS] [--python PYTHON]
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from optparse import OptionParser
+
+
+compilerDir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'compiler'))
+exoself = os.path.join(compilerDir, 'exoself')
+
+source = '''module startup
+
+def main() as int32
+{
+	return 0;
+}
+'''
+
+modes = [
+	('--save-dependencies', ['--save-dependencies', '-']),
+	('-A (parse only)', ['-A']),
+	('-c -O0', ['-c', '-O0']),
+	('-c -O1', ['-c', '-O1']),
+	]
+
+# in import order; every module is imported after the ones above it, so each time only includes the new work
+heavyModules = ['setuppaths', 'antlr3', 'tree', 'source2ast', 'typeannotator', 'llvm.core', 'ast2llvm']
+
+
+
+def timeProcess(python, args, cwd, runs):
+	''' returns the wall clock times of runs executions of the compiler '''
+	times = []
+	devNull = file(os.devnull, 'w')
+	for i in range(runs):
+		t = time.time()
+		status = subprocess.call([python, exoself] + args, cwd=cwd, stdout=devNull, stderr=devNull)
+		times.append(time.time() - t)
+
+		if status:
+			raise RuntimeError('compiler failed: %s' % ' '.join(args))
+	devNull.close()
+
+	return times
+
+
+def timeImports(python):
+	''' returns a list of (module name, seconds) measured in a fresh process '''
+	code = '''
+import sys
+import time
+sys.path.insert(0, %r)
+sys.argv[0] = %r
+for x in %r:
+	t = time.time()
+	__import__(x)
+	print x, time.time() - t
+''' % (compilerDir, exoself, heavyModules)
+
+	p = subprocess.Popen([python, '-c', code], stdout=subprocess.PIPE)
+	out = p.communicate()[0]
+
+	l = []
+	for line in out.splitlines():
+		name, t = line.split()
+		l.append((name, float(t)))
+
+	return l
+
+
+def median(l):
+	l = sorted(l)
+	return l[len(l) / 2]
+
+
+def main():
+	op = OptionParser()
+	op.add_option('-n', help='number of runs per mode', dest='runs', default=10, type='int')
+	op.add_option('--python', help='python interpreter used to run the compiler', dest='python', default=sys.executable)
+	options, args = op.parse_args()
+
+	tmpDir = tempfile.mkdtemp()
+	try:
+		f = file(os.path.join(tmpDir, 'startup.es'), 'wt')
+		f.write(source)
+		f.close()
+
+		print '%-24s %10s %10s' % ('mode', 'min [ms]', 'median [ms]')
+		for name, args in modes:
+			times = timeProcess(options.python, args + ['startup.es'], tmpDir, options.runs)
+			print '%-24s %10.1f %10.1f' % (name, min(times) * 1000, median(times) * 1000)
+
+		print
+		print '%-24s %10s' % ('import', 'time [ms]')
+		for name, t in timeImports(options.python):
+			print '%-24s %10.1f' % (name, t * 1000)
+	finally:
+		shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+	main()
+
@@ -0,0 +1,257 @@
+#!/usr/bin/python
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# measures how the compile time of each phase scales with the size of the compiled program
+#
+# One parameter of the program generator (generate.py) is varied over a list of values while all others keep their
+# defaults. For every value a program is generated and compiled with --trace-file; the durations of all events in the
+# trace are summed up per phase. Times are inclusive: a phase contains the time of all phases nested inside it, for
+# example import contains the annotate phase of the imported modules. A phase that grows much faster than the
+# program indicates a quadratic algorithm.
+#
+# usage: throughput.py [--parameter NAME] [--values V1,V2,...] [-n RUNS] [--json FILE] [--plot FILE] [generator options]
+
+import os
+import sys
+import math
+import json
+import shutil
+import tempfile
+import subprocess
+from optparse import OptionParser
+
+import generate
+
+
+srcDir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+compilerDir = os.path.join(srcDir, 'compiler')
+exoself = os.path.join(compilerDir, 'exoself')
+
+# the same search paths as configured by the top level wscript
+searchPaths = [os.path.join(srcDir, 'runtime'), srcDir]
+
+# phases that are reported per function or per optimization pass; they are too many for the table
+hiddenPhases = ['function']
+
+
+
+def readTrace(filename):
+	''' returns the events of a trace file; the closing bracket of the JSON array is optional and never written by the compiler '''
+	f = file(filename, 'rt')
+	s = f.read().strip()
+	f.close()
+
+	if s.endswith(','):
+		s = s[:-1]
+	if not s.endswith(']'):
+		s += ']'
+	return json.loads(s)
+
+
+def sumPhases(events):
+	''' returns a dict: phase name -> summed duration in seconds '''
+	phases = {}
+	for e in events:
+		if e.get('ph') != 'X':
+			continue
+
+		name = e['name']
+		detail = e.get('args', {}).get('detail', None)
+		if detail is not None:
+			name = name[:-len(detail) - 1]
+
+		phases[name] = phases.get(name, 0) + e['dur'] / 1000000.0
+	return phases
+
+
+def compileProgram(options, filenames, tmpDir):
+	''' compiles all modules of a program in a single compiler process; returns the phase durations '''
+	traceFile = os.path.join(tmpDir, 'trace.json')
+	if os.path.exists(traceFile):
+		os.unlink(traceFile)
+
+	args = [options.python, exoself, '-c', '-O%d' % options.optLevel, '--trace-file', traceFile]
+	for x in searchPaths:
+		args.extend(['-I', x])
+	args.extend(filenames)
+
+	# the bitcode cache would hide the work of the compiler
+	env = dict(os.environ)
+	env.pop('EXOSELF_CACHE_DIR', None)
+
+	p = subprocess.Popen(args, cwd=tmpDir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+	out = p.communicate()[0]
+	if p.returncode:
+		raise RuntimeError('%s failed:\n%s' % (' '.join(args), out))
+
+	return sumPhases(readTrace(traceFile))
+
+
+def countLines(filenames):
+	n = 0
+	for x in filenames:
+		f = file(x, 'rt')
+		n += len(f.readlines())
+		f.close()
+	return n
+
+
+def measure(options, kwargs):
+	''' generates a program and compiles it several times; returns a dict with the size and the minimum time of every phase '''
+	tmpDir = tempfile.mkdtemp()
+	try:
+		filenames = generate.generateProgram(tmpDir, **kwargs)
+
+		phases = {}
+		for i in range(options.runs):
+			for k, v in compileProgram(options, filenames, tmpDir).iteritems():
+				phases[k] = min(phases.get(k, v), v)
+
+		return {'modules': len(filenames), 'lines': countLines(filenames), 'phases': phases}
+	finally:
+		shutil.rmtree(tmpDir)
+
+
+def orderPhases(results):
+	''' returns the names of all reported phases, the slowest first '''
+	totals = {}
+	for r in results:
+		for k, v in r['phases'].iteritems():
+			if k in hiddenPhases or k.startswith('PASS_'):
+				continue
+			totals[k] = totals.get(k, 0) + v
+
+	l = [(-v, k) for k, v in totals.iteritems()]
+	l.sort()
+	return [k for v, k in l]
+
+
+def growth(a, b, phase):
+	''' returns the exponent e of t ~ lines ** e between two results; 1 means linear scaling '''
+	ta = a['phases'].get(phase, 0)
+	tb = b['phases'].get(phase, 0)
+	if ta <= 0 or tb <= 0 or a['lines'] == b['lines']:
+		return None
+	return math.log(tb / ta) / math.log(float(b['lines']) / a['lines'])
+
+
+def printTable(parameter, results, phases):
+	print '%-10s %8s %8s ' % (parameter, 'modules', 'lines') + ' '.join(['%12s' % x[:12] for x in phases])
+	for r in results:
+		print '%-10s %8d %8d ' % (r['value'], r['modules'], r['lines']) + ' '.join(['%12.3f' % r['phases'].get(x, 0) for x in phases])
+
+	if len(results) < 2:
+		return
+
+	# the growth between the smallest and the largest program
+	l = []
+	for x in phases:
+		e = growth(results[0], results[-1], x)
+		if e is None:
+			l.append('%12s' % '-')
+		else:
+			l.append('%12.2f' % e)
+	print '%-28s ' % 'growth exponent' + ' '.join(l)
+
+
+def plot(filename, parameter, results, phases):
+	try:
+		import matplotlib
+		matplotlib.use('Agg')
+		import matplotlib.pyplot as plt
+	except ImportError:
+		print >> sys.stderr, 'matplotlib is not installed; no plot written'
+		return
+
+	lines = [r['lines'] for r in results]
+	for x in phases:
+		plt.plot(lines, [r['phases'].get(x, 0) for r in results], marker='o', label=x)
+	plt.xlabel('lines of source code (varying %s)' % parameter)
+	plt.ylabel('time [s]')
+	plt.xscale('log')
+	plt.yscale('log')
+	plt.legend(loc='upper left', fontsize='small')
+	plt.savefig(filename)
+
+
+def main():
+	op = OptionParser()
+	op.set_usage('Usage: %prog [options]')
+	op.add_option('--parameter', help='generator parameter that is varied (default: functions)', dest='parameter', default='functions')
+	op.add_option('--values', help='comma separated values of the varied parameter', dest='values', default='25,50,100,200,400')
+	op.add_option('-n', help='number of compilations per program; the minimum time is reported', dest='runs', default=1, type='int')
+	op.add_option('-O', help='optimization level of the compiler', dest='optLevel', default=1, type='int')
+	op.add_option('--json', help='write the results to a JSON file', dest='jsonFilename', default=None)
+	op.add_option('--plot', help='plot the times of all phases to an image file (needs matplotlib)', dest='plotFilename', default=None)
+	op.add_option('--python', help='python interpreter used to run the compiler', dest='python', default=sys.executable)
+	generate.addOptions(op)
+	options, args = op.parse_args()
+
+	if args:
+		op.error('unexpected arguments: %s' % ' '.join(args))
+	if options.parameter not in generate.defaults:
+		op.error('unknown parameter: %s; valid are: %s' % (options.parameter, ', '.join(sorted(generate.defaults))))
+	try:
+		values = [int(x) for x in options.values.split(',')]
+	except ValueError:
+		op.error('--values needs a comma separated list of integers')
+	if options.runs < 1:
+		op.error('-n needs a positive number of runs')
+
+	kwargs = {}
+	for k in generate.defaults:
+		kwargs[k] = getattr(options, k)
+
+	results = []
+	for x in values:
+		generatorArgs = dict(kwargs)
+		generatorArgs[options.parameter] = x
+		r = measure(options, generatorArgs)
+		r['value'] = x
+		results.append(r)
+		print >> sys.stderr, '%s=%d: %d lines in %d modules' % (options.parameter, x, r['lines'], r['modules'])
+
+	phases = orderPhases(results)
+	printTable(options.parameter, results, phases)
+
+	if options.jsonFilename:
+		f = file(options.jsonFilename, 'wt')
+		json.dump({'parameter': options.parameter, 'generator': dict([(k, v) for k, v in kwargs.iteritems() if k != options.parameter]), 'optLevel': options.optLevel, 'results': results}, f, indent=1, sort_keys=True)
+		f.close()
+
+	if options.plotFilename:
+		plot(options.plotFilename, options.parameter, results, phases)
+
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
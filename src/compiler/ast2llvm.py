@@ -47,6 +47,7 @@ import astwalker
 from tree import Tree, TreeType
 import typeannotator
 import llvmdebug
+from timereport import getTimer
 
 
 
@@ -201,6 +202,16 @@ class ModuleTranslator(astwalker.ASTWalker):
 		# setup debug Info
 		self._setupDebugInformation()
 
+		# imported symbols may be shared with other compilation units (see ModuleCache)
+		# so they can still reference values of a different llvm module: drop them
+		for k, v in ast.symbolTable.getAllSymbols().iteritems():
+			if isinstance(v, list):
+				for x in v:
+					if hasattr(x, 'llvmRef'):
+						del x.llvmRef
+			elif isinstance(v, ESVariable) and hasattr(v, 'llvmRef'):
+				del v.llvmRef
+
 		# add some helper functions / prototypes / ... to the module
 		self._addHelperFunctionsPreTranslation()
 
@@ -228,11 +239,15 @@ class ModuleTranslator(astwalker.ASTWalker):
 
 
 		# translate
+		timer = getTimer()
 		for x in statements:
 			# skip globals, as they were already handled above
 			if x.type == TreeType.DEFGLOBAL:
 				continue
 
+			isFunction = x.type == TreeType.DEFFUNC
+			if isFunction:
+				timer.start('function', x.esFunction.name, countObjects=False)
 			try:
 				self._dispatch(x)
 			except RecoverableCompileError, e:
@@ -242,6 +257,9 @@ class ModuleTranslator(astwalker.ASTWalker):
 				print e.message.rstrip()
 				self._errors += 1
 				break
+			finally:
+				if isFunction:
+					timer.stop()
 
 		if self._errors:
 			raise CompileError('errors occured during compilation: aborting')
@@ -1109,11 +1127,16 @@ class ModuleTranslator(astwalker.ASTWalker):
 
 
 
-def run(module, function):
+def run(module, function, args=[]):
+	''' runs function of module in the JIT; the static ctors are called before and the static dtors afterwards; the module is owned by the JIT afterwards '''
 	mp = ModuleProvider.new(module)
 	ee = ExecutionEngine.new(mp)
 
-	return ee.run_function(function, [])
+	ee.run_static_ctors()
+	ret = ee.run_function(function, args)
+	ee.run_static_dtors()
+
+	return ret
 
 
 
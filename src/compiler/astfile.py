@@ -0,0 +1,394 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# reading and writing of AST files (.ast and .aast)
+#
+# An AST file is a flat binary image of a tree: all sections are arrays of fixed size records, so a node can be read
+# without reading the nodes before it. The nodes are stored in breadth first order; this way the children of every
+# node are consecutive and a node stores only the index of its first child and the number of children.
+#
+#     header
+#     node table          type, text, first child, number of children, type reference of every node
+#     location table      line and column of every node
+#     type table          first parent reference, number of parents and payload of every type
+#     type parents        indices of the parent types of all types
+#     attribute table     node, name, kind and value of simple attributes like the module name
+#     string offsets      end offsets of all strings in the string data
+#     string data         texts as utf-8, attribute names and values, marshaled type payloads
+#
+# Annotated trees also store the esType of every node. Types are interned: every distinct type is stored once and
+# elementary types are mapped to the unique instances of estypesystem when loading. Symbol tables and other objects
+# of the annotator are not stored; module interface files (.esi) hold the symbols.
+
+import mmap
+import struct
+import marshal
+
+from tree import Tree, nodeClasses
+
+
+AST_MAGIC = 'EAST'
+AST_VERSION = 1 # increment whenever the format changes
+
+FLAG_ANNOTATED = 1
+
+_header = struct.Struct('<4sHHIIIIII') # magic, version, flags, nodes, types, type parents, attributes, strings, string data size
+_node = struct.Struct('<iIIIi') # type, text, first child, number of children, esType or -1
+_location = struct.Struct('<II') # line, column
+_type = struct.Struct('<III') # first parent, number of parents, payload
+_index = struct.Struct('<I')
+_attribute = struct.Struct('<IIii') # node, name, kind, value
+
+# kinds of attribute values; strings are stored in the string data
+_ATTR_INT = 0
+_ATTR_BOOL = 1
+_ATTR_STR = 2
+_ATTR_UNICODE = 3
+
+# simple attributes of annotated trees which are stored
+_attributeNames = ['moduleName', 'packageName', 'signed', 'bits', 'minBits']
+
+
+
+class ASTFileError(Exception):
+	pass
+
+
+
+class _StringPool(object):
+	def __init__(self):
+		self.strings = []
+		self._indices = {}
+
+
+	def add(self, s):
+		try:
+			return self._indices[s]
+		except KeyError:
+			i = self._indices[s] = len(self.strings)
+			self.strings.append(s)
+			return i
+
+
+
+class _TypePool(object):
+	''' interns ESType instances: structurally identical types are stored once '''
+	def __init__(self, strings):
+		self._strings = strings
+		self._byId = {}
+		self._byKey = {}
+		self.types = [] # (parent indices, payload index)
+
+
+	def add(self, t):
+		# types are DAGs; find all types which are not yet interned and add them parents first
+		todo = [(t, False)]
+		while todo:
+			x, parentsDone = todo.pop()
+			if id(x) in self._byId:
+				continue
+
+			if not parentsDone:
+				todo.append((x, True))
+				for p in x.parents:
+					if id(p) not in self._byId:
+						todo.append((p, False))
+				continue
+
+			parents = tuple([self._byId[id(p)][0] for p in x.parents])
+			payload = self._strings.add(marshal.dumps(x.payload))
+			key = (parents, payload)
+			i = self._byKey.get(key, None)
+			if i is None:
+				i = self._byKey[key] = len(self.types)
+				self.types.append(key)
+			self._byId[id(x)] = (i, x) # keep x alive, so its id is not reused
+
+		return self._byId[id(t)][0]
+
+
+
+def dumpAST(ast, annotated=False):
+	''' returns the binary image of an AST '''
+	strings = _StringPool()
+	types = _TypePool(strings)
+
+	# breadth first order
+	nodes = [ast]
+	i = 0
+	while i < len(nodes):
+		nodes.extend(nodes[i].children)
+		i += 1
+
+	nodeData = []
+	locationData = []
+	attributes = []
+	firstChild = 1
+	for i, n in enumerate(nodes):
+		typeRef = -1
+		if annotated:
+			esType = getattr(n, 'esType', None)
+			if esType is not None:
+				typeRef = types.add(esType)
+
+			# nodes whose type was changed, like IMPLICITCAST nodes, may have attributes their new type has no slots for
+			slotNames = nodeClasses.get(n.type, Tree).slotNames
+			for name in _attributeNames:
+				if name not in slotNames:
+					continue
+				v = getattr(n, name, None)
+				if v is None:
+					continue
+				if isinstance(v, bool):
+					attributes.append((i, strings.add(name), _ATTR_BOOL, int(v)))
+				elif isinstance(v, (int, long)):
+					attributes.append((i, strings.add(name), _ATTR_INT, v))
+				elif isinstance(v, unicode):
+					attributes.append((i, strings.add(name), _ATTR_UNICODE, strings.add(v.encode('utf-8'))))
+				elif isinstance(v, str):
+					attributes.append((i, strings.add(name), _ATTR_STR, strings.add(v)))
+
+		nChildren = len(n.children)
+		nodeData.append(_node.pack(n.type, strings.add(n.text.encode('utf-8')), firstChild, nChildren, typeRef))
+		locationData.append(_location.pack(n.line, n.charPos))
+		firstChild += nChildren
+
+	typeData = []
+	typeParentData = []
+	nTypeParents = 0
+	for parents, payload in types.types:
+		typeData.append(_type.pack(nTypeParents, len(parents), payload))
+		for p in parents:
+			typeParentData.append(_index.pack(p))
+		nTypeParents += len(parents)
+
+	offsetData = []
+	end = 0
+	for s in strings.strings:
+		end += len(s)
+		offsetData.append(_index.pack(end))
+
+	flags = 0
+	if annotated:
+		flags |= FLAG_ANNOTATED
+
+	l = [_header.pack(AST_MAGIC, AST_VERSION, flags, len(nodes), len(types.types), nTypeParents, len(attributes), len(strings.strings), end)]
+	l.extend(nodeData)
+	l.extend(locationData)
+	l.extend(typeData)
+	l.extend(typeParentData)
+	l.extend([_attribute.pack(*x) for x in attributes])
+	l.extend(offsetData)
+	l.extend(strings.strings)
+	return ''.join(l)
+
+
+def saveAST(filename, ast, annotated=False):
+	''' writes an AST file; annotated trees also store the types of all nodes '''
+	data = dumpAST(ast, annotated)
+
+	f = file(filename, 'wb')
+	try:
+		f.write(data)
+	finally:
+		f.close()
+
+
+
+class ASTFile(object):
+	''' read access to the binary image of an AST
+
+	Nothing is read in advance: nodes, strings and types are decoded when they are requested. Use loadAST to map a
+	file into memory.
+	'''
+	def __init__(self, data):
+		self._data = data
+
+		if len(data) < _header.size:
+			raise ASTFileError('file too short')
+		magic, version, self.flags, self.nodeCount, self.typeCount, typeParentCount, attributeCount, self.stringCount, stringDataSize = _header.unpack_from(data, 0)
+		if magic != AST_MAGIC:
+			raise ASTFileError('not an AST file')
+		if version != AST_VERSION:
+			raise ASTFileError('unsupported AST file version %d, expected %d' % (version, AST_VERSION))
+
+		self._nodeOffset = _header.size
+		self._locationOffset = self._nodeOffset + self.nodeCount * _node.size
+		self._typeOffset = self._locationOffset + self.nodeCount * _location.size
+		self._typeParentOffset = self._typeOffset + self.typeCount * _type.size
+		self._attributeOffset = self._typeParentOffset + typeParentCount * _index.size
+		self._stringOffsetOffset = self._attributeOffset + attributeCount * _attribute.size
+		self._stringDataOffset = self._stringOffsetOffset + self.stringCount * _index.size
+		self._attributeCount = attributeCount
+
+		if len(data) != self._stringDataOffset + stringDataSize:
+			raise ASTFileError('file size does not match header')
+
+		self._types = {}
+		self._attributes = None
+
+
+	def isAnnotated(self):
+		return bool(self.flags & FLAG_ANNOTATED)
+
+
+	def getString(self, i):
+		if i:
+			start = _index.unpack_from(self._data, self._stringOffsetOffset + (i - 1) * _index.size)[0]
+		else:
+			start = 0
+		end = _index.unpack_from(self._data, self._stringOffsetOffset + i * _index.size)[0]
+		return self._data[self._stringDataOffset + start:self._stringDataOffset + end]
+
+
+	def getNode(self, i):
+		''' returns (type, text, first child, number of children, line, column) of a node; the root is node 0 '''
+		type, text, firstChild, nChildren, typeRef = _node.unpack_from(self._data, self._nodeOffset + i * _node.size)
+		line, charPos = _location.unpack_from(self._data, self._locationOffset + i * _location.size)
+		return type, self.getString(text).decode('utf-8'), firstChild, nChildren, line, charPos
+
+
+	def getType(self, i):
+		''' returns the ESType with the index i of the type table '''
+		try:
+			return self._types[i]
+		except KeyError:
+			pass
+
+		from estype import ESType, _getElementaryType
+
+		# load parents first without recursion
+		todo = [i]
+		while todo:
+			x = todo[-1]
+			if x in self._types:
+				todo.pop()
+				continue
+
+			firstParent, nParents, payload = _type.unpack_from(self._data, self._typeOffset + x * _type.size)
+			parents = [_index.unpack_from(self._data, self._typeParentOffset + (firstParent + j) * _index.size)[0] for j in range(nParents)]
+
+			missing = [p for p in parents if p not in self._types]
+			if missing:
+				todo.extend(missing)
+				continue
+			todo.pop()
+
+			payload = marshal.loads(self.getString(payload))
+			if payload[0] == 'elementary' and payload[1] != 'none':
+				# estypesystem looks up elementary types by identity
+				t = _getElementaryType(payload[1])
+			else:
+				t = ESType([self._types[p] for p in parents], payload)
+			self._types[x] = t
+
+		return self._types[i]
+
+
+	def _loadAttributes(self):
+		self._attributes = {}
+		for i in range(self._attributeCount):
+			node, name, kind, value = _attribute.unpack_from(self._data, self._attributeOffset + i * _attribute.size)
+			if kind == _ATTR_BOOL:
+				value = bool(value)
+			elif kind == _ATTR_STR:
+				value = self.getString(value)
+			elif kind == _ATTR_UNICODE:
+				value = self.getString(value).decode('utf-8')
+			self._attributes.setdefault(node, []).append((self.getString(name), value))
+
+
+	def getTree(self, root=0):
+		''' returns the subtree of the node root as Tree; annotated trees get their esType and attributes '''
+		annotated = self.isAnnotated()
+		if annotated and self._attributes is None:
+			self._loadAttributes()
+
+		texts = {} # string index -> decoded text; nodes of this tree share their texts
+
+		def create(i):
+			type, text, firstChild, nChildren, typeRef = _node.unpack_from(self._data, self._nodeOffset + i * _node.size)
+			line, charPos = _location.unpack_from(self._data, self._locationOffset + i * _location.size)
+
+			s = texts.get(text)
+			if s is None:
+				s = texts[text] = self.getString(text).decode('utf-8')
+			t = Tree(type, s, line, charPos)
+			if annotated:
+				if typeRef >= 0:
+					t.esType = self.getType(typeRef)
+				for name, value in self._attributes.get(i, []):
+					setattr(t, name, value)
+			return t, firstChild, nChildren
+
+		tree, firstChild, nChildren = create(root)
+		todo = [(tree, firstChild, nChildren)]
+		while todo:
+			t, firstChild, nChildren = todo.pop()
+			for i in range(firstChild, firstChild + nChildren):
+				c, cFirstChild, cChildren = create(i)
+				t.children.append(c)
+				todo.append((c, cFirstChild, cChildren))
+
+		return tree
+
+
+	def close(self):
+		if isinstance(self._data, mmap.mmap):
+			self._data.close()
+		self._data = None
+
+
+
+def openAST(filename):
+	''' maps an AST file into memory and returns an ASTFile '''
+	f = file(filename, 'rb')
+	try:
+		try:
+			data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		except ValueError:
+			raise ASTFileError('file too short') # empty files can not be mapped
+	finally:
+		f.close()
+
+	try:
+		return ASTFile(data)
+	except:
+		data.close()
+		raise
+
+
+def loadAST(filename):
+	''' returns the tree stored in an AST file '''
+	astFile = openAST(filename)
+	try:
+		return astFile.getTree()
+	finally:
+		astFile.close()
@@ -34,6 +34,8 @@ import pygtk
 pygtk.require('2.0')
 import gtk
 
+from sourcelines import getLineTable
+
 
 class ASTViewer(object):
 	def _deleteEvent(self, widget, event, data=None):
@@ -43,7 +45,7 @@ class ASTViewer(object):
 	def __init__(self, ast, sourcecode=''):
 		self._ast = ast
 		self._sourcecode = sourcecode
-		self._sourcecodeLines = sourcecode.splitlines()
+		self._sourcecodeLines = getLineTable(sourcecode)
 
 		self._window = gtk.Dialog()
 		self._window.set_title('Exoself AST Viewer')
@@ -101,9 +103,9 @@ class ASTViewer(object):
 			l.append(ast.text)
 
 		# source, if available
-		idx = ast.line - 1
-		if 0 <= idx <= len(self._sourcecodeLines):
-			l.append('% 5d: %s' % (ast.line, self._sourcecodeLines[idx]))
+		line = self._sourcecodeLines.getLine(ast.line)
+		if line is not None:
+			l.append('% 5d: %s' % (ast.line, line))
 		else:
 			l.append('% 5d' % ast.line)
 
@@ -130,14 +132,9 @@ def displayAST(ast, sourcecode=''):
 if __name__ == '__main__':
 	import sys
 	
-	try:
-		import cPickle as pickle
-	except ImportError:
-		import pickle
-
-	f = file(sys.argv[1], 'r')
-	ast = pickle.load(f)
-	f.close()
+	from astfile import loadAST
+
+	ast = loadAST(sys.argv[1])
 	
 	if len(sys.argv) > 1:
 		sourcecode = file(sys.argv[2]).read()
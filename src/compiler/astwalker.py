@@ -31,15 +31,241 @@
 from errors import CompileError, RecoverableCompileError
 import os
 from tree import TreeType
+from sourcelines import getLineTable
 
 from esfunction import ESFunction
 
 
 
+# argument extractors; they return the arguments of a handler after ast as a tuple in the order of its parameters
+
+def _noArgs(ast):
+	return ()
+
+
+def _argsModuleStart(ast):
+	tt = TreeType
+	packageName = None
+	moduleName = None
+
+	idx = 0
+	for x in ast.children:
+		if x.type == tt.PACKAGE:
+			packageName = x.children[0]
+			idx += 1
+		elif x.type == tt.MODULE:
+			moduleName = x.children[0]
+			idx += 1
+	return (packageName, moduleName, ast.children[idx:])
+
+
+def _argsDefFunction(ast):
+	tt = TreeType
+	children = ast.children
+	n = len(children)
+	assert(children[0].type == tt.DEFFUNCMODIFIERS) # function modifiers
+	assert(children[1].type == tt.NAME) # function name
+	assert(children[2].type == tt.TYPENAME) # return type
+	assert(children[3].type == tt.DEFFUNCARGS) # argument list
+	if n > 4:
+		assert(children[4].type == tt.BLOCK) # optional block argument
+	assert(n <= 5)
+
+	modifiers = children[0].children # key, value pairs
+	nModifiers = len(modifiers) // 2 * 2
+	arguments = children[3].children # name, type name pairs
+	nArguments = len(arguments) // 2 * 2
+
+	if n == 5:
+		block = children[4]
+	else:
+		block = None
+
+	# modifiers, function name, return type, argument list, block
+	return (modifiers[0:nModifiers:2], modifiers[1:nModifiers:2], children[1], children[2], arguments[0:nArguments:2], arguments[1:nArguments:2], block)
+
+
+def _argsFirstChild(ast):
+	return (ast.children[0],)
+
+
+def _argsChildren(ast):
+	return (ast.children,)
+
+
+def _argsTwoChildren(ast):
+	return (ast.children[0], ast.children[1])
+
+
+def _argsOptionalSecondChild(ast):
+	n = len(ast.children)
+	if n == 1:
+		return (ast.children[0], None)
+	elif n == 2:
+		return (ast.children[0], ast.children[1])
+	else:
+		assert(0 and 'dead code path')
+
+
+def _argsIf(ast):
+	children = ast.children
+	n = len(children)
+	if n & 1:
+		elseBlock = children[-1]
+	else:
+		elseBlock = None
+	return (children[0:n - 1:2], children[1:n:2], elseBlock)
+
+
+def _argsFor(ast):
+	rangeNode = ast.children[1]
+	assert(rangeNode.type == TreeType.RANGE)
+	rangeStart = None
+	rangeStop = None
+	rangeStep = None
+
+	n = len(rangeNode.children)
+	if n == 1:
+		rangeStop = rangeNode.children[0]
+	elif n == 2:
+		rangeStart = rangeNode.children[0]
+		rangeStop = rangeNode.children[1]
+	elif n == 3:
+		rangeStart = rangeNode.children[0]
+		rangeStop = rangeNode.children[1]
+		rangeStep = rangeNode.children[2]
+	else:
+		assert(0 and 'dead code path')
+
+	return (ast.children[0], rangeStart, rangeStop, rangeStep, ast.children[2])
+
+
+def _splitSuffix(text, digits):
+	value = text.replace('_', '')
+	suffix = []
+	for x in reversed(value):
+		if x.lower() in digits:
+			break
+
+		suffix.insert(0, x)
+	suffix = u''.join(suffix)
+
+	if suffix:
+		value = value[:-len(suffix)]
+	return value.lower(), suffix
+
+
+def _argsIntegerConstant(ast):
+	value, suffix = _splitSuffix(ast.children[0].text, '01234567890abcdef')
+
+	if value.startswith('0x'):
+		i = int(value[2:], 16)
+	elif value.startswith('0b'):
+		i = int(value[2:], 2)
+	elif value.startswith('0') and len(value) > 1:
+		i = int(value[1:], 8)
+	else:
+		i = int(value)
+
+	return (i, suffix)
+
+
+def _argsFloatConstant(ast):
+	return _splitSuffix(ast.children[0].text, '0123456789eE') # the value is still a string
+
+
+def _argsCallFunc(ast):
+	return (ast.children[0], ast.children[1:])
+
+
+def _argsDefGlobal(ast):
+	if ast.children[1].type == TreeType.TYPENAME:
+		return (ast.children[0], ast.children[1], None)
+	else:
+		return (ast.children[0], None, ast.children[1])
+
+
+def _argsListAssign(ast):
+	assert(len(ast.children[0].children) == len(ast.children[1].children))
+	return (ast.children[0].children, ast.children[1].children)
+
+
+def _argsBasicOperator(ast):
+	n = len(ast.children)
+	if n == 1:
+		return (ast.type, ast.children[0], None)
+	elif n == 2:
+		return (ast.type, ast.children[0], ast.children[1])
+	else:
+		assert(0 and 'dead code path')
+
+
+def _argsStruct(ast):
+	return (ast.children[0], ast.children[1:])
+
+
+def _argsBooleanConstant(ast):
+	return (ast.children[0].type == TreeType.TRUE,)
+
+
+
+def _buildDispatchTable():
+	tt = TreeType
+
+	# node types -> (handler name, argument extractor, cache flag)
+	# The arguments of nodes with a set cache flag are stored in the dispatchArgs slot of the node, see tree.py, since
+	# these nodes are visited repeatedly: function definitions by the prototype and the definition pass of the type
+	# annotator and by the code generator, constants by the type annotator and the code generator.
+	dt = {
+		tt.MODULESTART: ('_onModuleStart', _argsModuleStart, False),
+		tt.IMPORTALL: ('_onImportAll', _argsFirstChild, False),
+		tt.DEFFUNC: ('_onDefFunction', _argsDefFunction, True),
+		tt.BLOCK: ('_onBlock', _argsChildren, False),
+		tt.PASS: ('_onPass', _noArgs, False),
+		tt.RETURN: ('_onReturn', _argsChildren, False),
+		tt.ASSERT: ('_onAssert', _argsFirstChild, False),
+		tt.IF: ('_onIf', _argsIf, False),
+		tt.FOR: ('_onFor', _argsFor, False),
+		tt.WHILE: ('_onWhile', _argsTwoChildren, False),
+		tt.BREAK: ('_onBreak', _noArgs, False),
+		tt.CONTINUE: ('_onContinue', _noArgs, False),
+		tt.INTEGER_CONSTANT: ('_onIntegerConstant', _argsIntegerConstant, True),
+		tt.FLOAT_CONSTANT: ('_onFloatConstant', _argsFloatConstant, False),
+		tt.STRING_CONSTANT: ('_onStringConstant', _argsFirstChild, False), # TODO unpack value; see INTEGER_CONSTANT
+		tt.CALLFUNC: ('_onCallFunc', _argsCallFunc, False),
+		tt.VARIABLE: ('_onVariable', _argsFirstChild, False),
+		tt.DEFVAR: ('_onDefVariable', _argsTwoChildren, False),
+		tt.DEFGLOBAL: ('_onDefGlobal', _argsDefGlobal, False),
+		tt.ASSIGN: ('_onAssign', _argsTwoChildren, False),
+		tt.LISTASSIGN: ('_onListAssign', _argsListAssign, False),
+		# these are handled exactly equal, IMPLICITCAST only makes debugging easier
+		tt.CAST: ('_onCast', _argsTwoChildren, False),
+		tt.IMPLICITCAST: ('_onCast', _argsTwoChildren, False),
+		tt.TYPENAME: ('_onTypeName', _noArgs, False),
+		tt.FUNCTIONTYPENAME: ('_onFunctionTypeName', _noArgs, False),
+		tt.DEREFERENCE: ('_onDereference', _argsOptionalSecondChild, False),
+		tt.ALIAS: ('_onAlias', _argsTwoChildren, False),
+		tt.TYPEDEF: ('_onTypedef', _argsTwoChildren, False),
+		tt.ADDRESSOF: ('_onAddressOf', _argsFirstChild, False),
+		tt.NEW: ('_onNew', _argsOptionalSecondChild, False),
+		tt.STRUCT: ('_onDefStruct', _argsStruct, False),
+		tt.NONE_CONSTANT: ('_onNoneConstant', _noArgs, False),
+		tt.BOOLEAN_CONSTANT: ('_onBooleanConstant', _argsBooleanConstant, False),
+		}
+
+	for t in [tt.PLUS, tt.MINUS, tt.STAR, tt.DOUBLESTAR, tt.SLASH, tt.PERCENT,
+			tt.NOT, tt.AND, tt.OR, tt.XOR,
+			tt.LESS, tt.LESSEQUAL, tt.EQUAL, tt.NOTEQUAL, tt.GREATEREQUAL, tt.GREATER]:
+		dt[t] = ('_onBasicOperator', _argsBasicOperator, False)
+
+	return dt
+_dispatchTable = _buildDispatchTable()
+
+
+
 class ASTWalker(object):
 	def __init__(self):
-		dt = {}
-		self._dispatchTable = dt
+		self._dispatchTable = _dispatchTable # shared by all walkers
 		self._nodes = [] # contains a list of all nodes starting with root node to current node; maintained by _dispatch
 
 
@@ -48,7 +274,7 @@ class ASTWalker(object):
 		assert(os.path.isabs(filename))
 		self._filename = filename
 		self._sourcecode = sourcecode
-		self._sourcecodeLines = sourcecode.splitlines()
+		self._sourcecodeLines = getLineTable(sourcecode)
 
 		self._dispatch(ast)
 
@@ -56,301 +282,27 @@ class ASTWalker(object):
 
 
 	def _dispatch(self, ast):
-		tt = TreeType
-		kwargs = {}
-		kwargs['ast'] = ast
-		callee = None
-
-		t = ast.type
-
-		if t == tt.MODULESTART:
-			callee = self._onModuleStart
-
-			packageName = None
-			moduleName = None
-
-			n = len(ast.children)
-			idx = 0
-			for i in range(n):
-				if ast.children[i].type == tt.PACKAGE:
-					packageName = ast.children[i].children[0]
-					idx += 1
-				elif ast.children[i].type == tt.MODULE:
-					moduleName = ast.children[i].children[0]
-					idx += 1
-			kwargs['statements'] = ast.children[idx:]
-			kwargs['packageName'] = packageName
-			kwargs['moduleName'] = moduleName
-		elif t == tt.IMPORTALL:
-			callee = self._onImportAll
-			kwargs['moduleName'] = ast.children[0]
-		elif t == tt.DEFFUNC:
-			callee = self._onDefFunction
-
-			n = len(ast.children)
-			assert(ast.children[0].type == tt.DEFFUNCMODIFIERS) # function modifiers
-			assert(ast.children[1].type == tt.NAME) # function name
-			assert(ast.children[2].type == tt.TYPENAME) # return type
-			assert(ast.children[3].type == tt.DEFFUNCARGS) # argument list
-			if n > 4:
-				assert(ast.children[4].type == tt.BLOCK) # optional block argument
-			assert(n <= 5)
-
-			# modifiers
-			modifierKeys = []
-			modifierValues = []
-			for i in range(len(ast.children[0].children) // 2):
-				modifierKeys.append(ast.children[0].children[2 * i])
-				modifierValues.append(ast.children[0].children[2 * i + 1])
-			kwargs['modifierKeys'] = modifierKeys
-			kwargs['modifierValues'] = modifierValues
-
-			# function name
-			kwargs['name'] = ast.children[1]
-
-			# return type
-			kwargs['returnTypeName'] = ast.children[2]
-
-			# argument list
-			parameterNames = []
-			parameterTypeNames = []
-			argListNode = ast.children[3]
-			for i in range(len(argListNode.children) // 2):
-				parameterNames.append(argListNode.children[2 * i])
-				parameterTypeNames.append(argListNode.children[2 * i + 1])
-			kwargs['parameterNames'] = parameterNames
-			kwargs['parameterTypeNames'] = parameterTypeNames
-
-			# block, if available
-			if n == 4:
-				block = None
-			elif n == 5:
-				block = ast.children[4]
-			elif n > 5:
-				assert(0 and 'dead code path')
-			kwargs['block'] = block
-
-		elif t == tt.BLOCK:
-			callee = self._onBlock
-			kwargs['blockContent'] = ast.children
-		elif t == tt.PASS:
-			callee = self._onPass
-		elif t == tt.RETURN:
-			callee = self._onReturn
-			kwargs['expressions'] = ast.children
-		elif t == tt.ASSERT:
-			callee = self._onAssert
-			kwargs['expression'] = ast.children[0]
-		elif t == tt.IF:
-			callee = self._onIf
-
-			expressions = []
-			blocks = []
-			elseBlock = None
-			for i in range(len(ast.children) // 2):
-				expressions.append(ast.children[2 * i])
-				blocks.append(ast.children[2 * i + 1])
-			if len(ast.children) & 1:
-				elseBlock = ast.children[-1]
-
-			kwargs['expressions'] = expressions
-			kwargs['blocks'] = blocks
-			kwargs['elseBlock'] = elseBlock
-		elif t == tt.FOR:
-			callee = self._onFor
-			kwargs['variableName'] = ast.children[0]
-
-			rangeNode = ast.children[1]
-			assert(rangeNode.type == tt.RANGE)
-			rangeStart = None
-			rangeStop = None
-			rangeStep = None
-
-			n = len(rangeNode.children)
-			if n == 1:
-				rangeStop = rangeNode.children[0]
-			elif n == 2:
-				rangeStart = rangeNode.children[0]
-				rangeStop = rangeNode.children[1]
-			elif n == 3:
-				rangeStart = rangeNode.children[0]
-				rangeStop = rangeNode.children[1]
-				rangeStep = rangeNode.children[2]
-			else:
-				assert(0 and 'dead code path')
-
-			kwargs['rangeStart'] = rangeStart
-			kwargs['rangeStop'] = rangeStop
-			kwargs['rangeStep'] = rangeStep
-
-			kwargs['block'] = ast.children[2]
-		elif t == tt.WHILE:
-			callee = self._onWhile
-			kwargs['expression'] = ast.children[0]
-			kwargs['block'] = ast.children[1]
-		elif t == tt.BREAK:
-			callee = self._onBreak
-		elif t == tt.CONTINUE:
-			callee = self._onContinue
-		elif t == tt.INTEGER_CONSTANT:
-			callee = self._onIntegerConstant
-
-			value = ast.children[0].text.replace('_', '')
-			suffix = []
-			for x in reversed(value):
-				if x.lower() in '01234567890abcdef':
-					break
-
-				suffix.insert(0, x)
-			suffix = u''.join(suffix)
-
-			if suffix:
-				value = value[:-len(suffix)]
-			value = value.lower()
-
-			if value.startswith('0x'):
-				i = int(value[2:], 16)
-			elif value.startswith('0b'):
-				i = int(value[2:], 2)
-			elif value.startswith('0') and len(value) > 1:
-				i = int(value[1:], 8)
-			else:
-				i = int(value)
-
-			kwargs['value'] = i
-			kwargs['suffix'] = suffix
-		elif t == tt.FLOAT_CONSTANT:
-			callee = self._onFloatConstant
-
-			value = ast.children[0].text.replace('_', '')
-			suffix = []
-			for x in reversed(value):
-				if x.lower() in '0123456789eE':
-					break
-
-				suffix.insert(0, x)
-			suffix = u''.join(suffix)
-
-			if suffix:
-				value = value[:-len(suffix)]
-			value = value.lower()
-
-			kwargs['value'] = value # should be a string
-			kwargs['suffix'] = suffix
-		elif t == tt.STRING_CONSTANT:
-			callee = self._onStringConstant
-			# TODO unpack value; see INTEGER_CONSTANT
-			kwargs['constant'] = ast.children[0]
-		elif t == tt.CALLFUNC:
-			callee = self._onCallFunc
-			kwargs['calleeName'] = ast.children[0]
-			kwargs['expressions'] = ast.children[1:]
-		elif t == tt.VARIABLE:
-			callee = self._onVariable
-			kwargs['variableName'] = ast.children[0]
-		elif t == tt.DEFVAR:
-			callee = self._onDefVariable
-			kwargs['variableName'] = ast.children[0]
-			kwargs['typeName'] = ast.children[1]
-		elif t == tt.DEFGLOBAL:
-			callee = self._onDefGlobal
-			kwargs['variableName'] = ast.children[0]
-			if ast.children[1].type == tt.TYPENAME:
-				kwargs['typeName'] = ast.children[1]
-				kwargs['expression'] = None
-			else:
-				kwargs['typeName'] = None
-				kwargs['expression'] = ast.children[1]
-		elif t == tt.ASSIGN:
-			callee = self._onAssign
-			kwargs['assigneeExpr'] = ast.children[0]
-			kwargs['expression'] = ast.children[1]
-		elif t == tt.LISTASSIGN:
-			callee = self._onListAssign
-			assert(len(ast.children[0].children) == len(ast.children[1].children))
-			kwargs['variableNames'] = ast.children[0].children
-			kwargs['expressions'] = ast.children[1].children
-		elif t in [tt.PLUS, tt.MINUS, tt.STAR, tt.DOUBLESTAR, tt.SLASH, tt.PERCENT,
-				tt.NOT, tt.AND, tt.OR, tt.XOR,
-				tt.LESS, tt.LESSEQUAL, tt.EQUAL, tt.NOTEQUAL, tt.GREATEREQUAL, tt.GREATER]:
-			callee = self._onBasicOperator
-
-			n = len(ast.children)
-			v1 = ast.children[0]
-			v2 = None
-			op = t
-
-			if n == 1:
-				pass
-			elif n == 2:
-				v2 = ast.children[1]
-			else:
-				assert(0 and 'dead code path')
-
-			kwargs['op'] = op
-			kwargs['arg1'] = v1
-			kwargs['arg2'] = v2
-		elif t == tt.CAST or t == tt.IMPLICITCAST:# these are handled exactly equal, IMPLICITCAST only makes debugging easier
-			callee = self._onCast
-			kwargs['expression'] = ast.children[0]
-			kwargs['typeName'] = ast.children[1]
-		elif t == tt.TYPENAME:
-			callee = self._onTypeName
-		elif t == tt.FUNCTIONTYPENAME:
-			callee = self._onFunctionTypeName
-		elif t == tt.DEREFERENCE:
-			callee = self._onDereference
-			kwargs['expression'] = ast.children[0]
-
-			if len(ast.children) == 1:
-				indexExpression = None
-			elif len(ast.children) == 2:
-				indexExpression = ast.children[1]
-			else:
-				assert(0 and 'dead code path')
-			kwargs['indexExpression'] = indexExpression
-		elif t == tt.ALIAS:
-			callee = self._onAlias
-			kwargs['name'] = ast.children[0]
-			kwargs['typeName'] = ast.children[1]
-		elif t == tt.TYPEDEF:
-			callee = self._onTypedef
-			kwargs['name'] = ast.children[0]
-			kwargs['typeName'] = ast.children[1]
-		elif t == tt.ADDRESSOF:
-			callee = self._onAddressOf
-			kwargs['expression'] = ast.children[0]
-		elif t == tt.NEW:
-			callee = self._onNew
-			kwargs['typeName'] = ast.children[0]
-
-			if len(ast.children) == 1:
-				numExpr = None
-			elif len(ast.children) == 2:
-				numExpr = ast.children[1]
-			else:
-				assert(0 and 'dead code path')
-
-			kwargs['numExpr'] = numExpr
-		elif t == tt.STRUCT:
-			callee = self._onDefStruct
-			kwargs['name'] = ast.children[0]
-			kwargs['members'] = ast.children[1:]
-		elif t == tt.NONE_CONSTANT:
-			callee = self._onNoneConstant
-		elif t == tt.BOOLEAN_CONSTANT:
-			callee = self._onBooleanConstant
-
-			value = ast.children[0].type == TreeType.TRUE
-			kwargs['value'] = value
-		else:
-			print t
+		entry = self._dispatchTable.get(ast.type)
+		if entry is None:
+			print ast.type
 			assert(0 and 'dead code path / support for new token type not implemented')
+		handlerName, extractor, cached = entry
+
+		if cached:
+			try:
+				args = ast.dispatchArgs
+			except AttributeError:
+				args = ast.dispatchArgs = extractor(ast)
+		else:
+			args = extractor(ast)
+
+		# looked up on every call: the type annotator temporarily replaces _onDefFunction
+		callee = getattr(self, handlerName)
 
 		self._nodes.append(ast)
 		#print '-->', self._nodes[-1].text, self._nodes[-1].line, self._nodes[-1].charPos
 		try:
-			return callee(**kwargs)
+			return callee(ast, *args)
 		finally:
 			#print '<--', self._nodes[-1].text, self._nodes[-1].line, self._nodes[-1].charPos
 			self._nodes.pop()
@@ -403,7 +355,12 @@ class ASTWalker(object):
 		else:
 			s = self._generateContext(preText=preText, postText=postText, inlineText=inlineText)
 
-		raise exType(s)
+		# the position and the short message are used by tools like the language server
+		e = exType(s)
+		e.line = line or (tree and tree.line) or None
+		e.charPos = (not line and tree and tree.charPos) or 0
+		e.shortMessage = inlineText or postText
+		raise e
 
 
 	def _findSymbolHelper(self, name):
@@ -0,0 +1,345 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# on-disk cache for compiled bitcode files, similar to ccache
+#
+# A result depends on the source, the modules imported directly or indirectly, the options affecting code generation
+# and the compiler itself. The imported modules are only known after the source was annotated, so lookups are done
+# in two steps:
+#     the manifest, found using the hash of the source, the options and the compiler, lists the hashes of the
+#     imported modules of all results cached for this source
+#     the first entry whose imported modules are unchanged points to the cached bitcode file
+
+import os
+import json
+import fcntl
+import shutil
+import hashlib
+import tempfile
+try:
+	import cPickle as pickle
+except ImportError:
+	import pickle
+
+from moduleinterface import hashFile, hashSource
+
+
+CACHE_VERSION = '1' # increment whenever the layout of the cache changes
+MAX_MANIFEST_ENTRIES = 10 # results for different versions of imported modules stored per source
+
+
+_compilerHash = None
+def getCompilerHash():
+	''' returns a hash of all source files of the compiler '''
+	global _compilerHash
+
+	if _compilerHash:
+		return _compilerHash
+
+	md5 = hashlib.md5()
+	path = os.path.dirname(os.path.abspath(__file__))
+	for d in [path, os.path.join(path, 'grammar')]:
+		for x in sorted(os.listdir(d)):
+			if not (x.endswith('.py') or x.endswith('.g') or x == 'exoself'):
+				continue
+
+			md5.update(x)
+			md5.update(hashFile(os.path.join(d, x)) or '')
+
+	_compilerHash = md5.hexdigest()
+	return _compilerHash
+
+
+
+class BitcodeCache(object):
+	''' stores compiled bitcode files in cacheDir; the least recently used files are removed when the cache grows larger than maxSize bytes
+
+	options is a list of strings describing all options which affect the generated code
+	'''
+
+	def __init__(self, cacheDir, maxSize, options):
+		self._cacheDir = cacheDir
+		self._maxSize = maxSize
+		self._options = options
+		self._fileHashes = {} # hashes of imported modules computed during this run
+
+
+	def lookup(self, filename, source, outputFilename):
+		''' copies the cached result to outputFilename; returns False if there is none '''
+		assert(os.path.isabs(filename))
+
+		manifestFilename = self._getManifestFilename(filename, source)
+		for dependencyHashes, objectName in self._loadManifest(manifestFilename):
+			for fn, h in dependencyHashes.iteritems():
+				if self._hashFile(fn) != h:
+					break
+			else:
+				objectFilename = os.path.join(self._cacheDir, objectName)
+				try:
+					shutil.copyfile(objectFilename, outputFilename)
+
+					# mark as recently used
+					os.utime(objectFilename, None)
+					os.utime(manifestFilename, None)
+				except (IOError, OSError):
+					break # evicted in the meantime
+
+				self._count('hits')
+				return True
+
+		self._count('misses')
+		return False
+
+
+	def store(self, filename, source, dependencyHashes, outputFilename):
+		''' adds the bitcode file outputFilename compiled from source
+
+		dependencyHashes maps all modules imported directly or indirectly to the md5 hashes of their sources
+		'''
+		assert(os.path.isabs(filename))
+
+		manifestFilename = self._getManifestFilename(filename, source)
+		md5 = hashlib.md5(manifestFilename)
+		for fn in sorted(dependencyHashes):
+			md5.update(fn)
+			md5.update(dependencyHashes[fn])
+		objectName = md5.hexdigest() + '.bc'
+		objectFilename = os.path.join(self._cacheDir, objectName)
+
+		try:
+			self._ensureCacheDir()
+			oldSize = self._getFileSize(objectFilename) + self._getFileSize(manifestFilename)
+
+			fd, tmpFilename = tempfile.mkstemp(suffix='.tmp', dir=self._cacheDir)
+			os.close(fd)
+			shutil.copyfile(outputFilename, tmpFilename)
+			os.rename(tmpFilename, objectFilename)
+
+			# newest entries first; drop entries of outdated imported modules
+			entries = [(dependencyHashes, objectName)]
+			for x in self._loadManifest(manifestFilename):
+				if x[1] != objectName and len(entries) < MAX_MANIFEST_ENTRIES:
+					entries.append(x)
+			self._writeFile(manifestFilename, pickle.dumps(entries, pickle.HIGHEST_PROTOCOL))
+
+			self._addSize(self._getFileSize(objectFilename) + self._getFileSize(manifestFilename) - oldSize)
+		except (IOError, OSError):
+			pass # the cache only speeds up compilation
+
+
+	def getStatistics(self):
+		''' returns a dict with the number of hits and misses, the number of files and the size of the cache '''
+		stats = {'hits': 0, 'misses': 0}
+		try:
+			f = file(os.path.join(self._cacheDir, 'stats'))
+			try:
+				stats.update(json.loads(f.read() or '{}'))
+			finally:
+				f.close()
+		except IOError:
+			pass
+
+		files = self._listFiles()
+		stats['files'] = len(files)
+		stats['size'] = sum([x[1] for x in files])
+		stats['maxSize'] = self._maxSize
+
+		return stats
+
+
+	def formatStatistics(self):
+		stats = self.getStatistics()
+		lookups = stats['hits'] + stats['misses']
+		if lookups:
+			rate = 100.0 * stats['hits'] / lookups
+		else:
+			rate = 0.0
+
+		s = []
+		s.append('bitcode cache: %s' % self._cacheDir)
+		s.append('    hits: %d' % stats['hits'])
+		s.append('    misses: %d' % stats['misses'])
+		s.append('    hit rate: %.1f%%' % rate)
+		s.append('    files: %d' % stats['files'])
+		s.append('    size: %.1f MB (max %.1f MB)' % (stats['size'] / 1024.0 / 1024.0, stats['maxSize'] / 1024.0 / 1024.0))
+
+		return '\n'.join(s)
+
+
+	def _getManifestFilename(self, filename, source):
+		# the filename is part of the key: it is embedded into assertion messages and debug information
+		md5 = hashlib.md5()
+		for x in [CACHE_VERSION, getCompilerHash(), filename, hashSource(source)] + self._options:
+			md5.update(x)
+			md5.update('\0')
+
+		return os.path.join(self._cacheDir, md5.hexdigest() + '.manifest')
+
+
+	def _loadManifest(self, manifestFilename):
+		try:
+			f = file(manifestFilename, 'rb')
+		except IOError:
+			return []
+
+		try:
+			try:
+				return pickle.load(f)
+			finally:
+				f.close()
+		except Exception:
+			return [] # truncated or corrupt; gets replaced by the next store
+
+
+	def _hashFile(self, filename):
+		if filename not in self._fileHashes:
+			self._fileHashes[filename] = hashFile(filename)
+
+		return self._fileHashes[filename]
+
+
+	def _ensureCacheDir(self):
+		if not os.path.isdir(self._cacheDir):
+			try:
+				os.makedirs(self._cacheDir)
+			except OSError:
+				# maybe created by another compiler process in the meantime
+				if not os.path.isdir(self._cacheDir):
+					raise
+
+
+	def _writeFile(self, filename, data):
+		# several compiler processes may use the cache: write to a temporary file and atomically replace the old one
+		fd, tmpFilename = tempfile.mkstemp(suffix='.tmp', dir=self._cacheDir)
+		try:
+			f = os.fdopen(fd, 'wb')
+			try:
+				f.write(data)
+			finally:
+				f.close()
+			os.rename(tmpFilename, filename)
+		except:
+			os.remove(tmpFilename)
+			raise
+
+
+	def _listFiles(self):
+		# returns a list of (mtime, size, filename) of all cache entries
+		try:
+			names = os.listdir(self._cacheDir)
+		except OSError:
+			return []
+
+		l = []
+		for x in names:
+			if not (x.endswith('.bc') or x.endswith('.manifest')):
+				continue
+
+			fn = os.path.join(self._cacheDir, x)
+			try:
+				st = os.stat(fn)
+			except OSError:
+				continue # removed by another process
+			l.append((st.st_mtime, st.st_size, fn))
+
+		return l
+
+
+	def _getFileSize(self, filename):
+		try:
+			return os.path.getsize(filename)
+		except OSError:
+			return 0
+
+
+	def _addSize(self, delta):
+		# like ccache the stats file keeps a running total of the cache size, so the cache directory is only scanned
+		# when the total exceeds the limit; the total is corrected by every cleanup
+		def update(stats):
+			if 'size' in stats:
+				stats['size'] += delta
+			else:
+				# written by an older compiler; the listing already contains the new files
+				stats['size'] = sum([x[1] for x in self._listFiles()])
+
+		stats = self._updateStats(update)
+		if stats and stats['size'] > self._maxSize:
+			self._cleanup()
+
+
+	def _cleanup(self):
+		# remove least recently used entries until the cache is well below the limit, so this does not happen on every store
+		files = self._listFiles()
+		size = sum([x[1] for x in files])
+
+		if size > self._maxSize:
+			files.sort()
+			for mtime, fileSize, fn in files:
+				if size <= self._maxSize * 0.8:
+					break
+
+				try:
+					os.remove(fn)
+				except OSError:
+					pass
+				size -= fileSize
+
+		def update(stats):
+			stats['size'] = size
+		self._updateStats(update)
+
+
+	def _count(self, what):
+		def update(stats):
+			stats[what] = stats.get(what, 0) + 1
+		self._updateStats(update)
+
+
+	def _updateStats(self, update):
+		# statistics are shared by all compiler processes: update(stats) changes the dict while the file is locked
+		# returns the new statistics or None, if they could not be updated
+		try:
+			self._ensureCacheDir()
+			fd = os.open(os.path.join(self._cacheDir, 'stats'), os.O_RDWR | os.O_CREAT, 0666)
+			f = os.fdopen(fd, 'r+')
+			try:
+				fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+				stats = json.loads(f.read() or '{}')
+				update(stats)
+				f.seek(0)
+				f.truncate()
+				f.write(json.dumps(stats))
+			finally:
+				f.close()
+		except (IOError, OSError, ValueError):
+			return None
+
+		return stats
+
@@ -0,0 +1,82 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# a compact character stream for the lexer
+#
+# antlr3.ANTLRStringStream converts the source to unicode and builds a list with one Python int per character,
+# which needs dozens of bytes per character. This stream stores the characters in an array of bytes and returns
+# token texts as slices of the source string itself, so it needs about one byte per source character.
+
+from array import array
+
+import antlr3
+
+
+class ByteCharStream(antlr3.ANTLRStringStream):
+	''' character stream over a byte string
+
+	The grammar expects every statement to end with a newline, so the stream always ends with an additional newline.
+	The source string itself is not copied.
+	'''
+	def __init__(self, source):
+		antlr3.CharStream.__init__(self)
+
+		self.strdata = source
+		self.data = array('B', source)
+		self.data.append(10) # the additional newline
+
+		self.n = len(self.data)
+		self.p = 0
+		self.line = 1
+		self.charPositionInLine = 0
+		self._markers = []
+		self.lastMarker = None
+		self.markDepth = 0
+		self.name = None
+
+
+	def LT(self, i):
+		if i == 0:
+			return 0 # undefined
+
+		if i < 0:
+			i += 1
+
+		p = self.p + i - 1
+		if p >= self.n or p < 0:
+			return antlr3.EOF
+		return chr(self.data[p])
+
+
+	def substring(self, start, stop):
+		s = self.strdata[start:stop + 1]
+		if stop >= len(self.strdata):
+			s += '\n'
+		return s
@@ -0,0 +1,244 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# keep this module free of compiler imports: the client side is used by waf and the exoself-client script
+import os
+import sys
+import socket
+import SocketServer
+import json
+import traceback
+from StringIO import StringIO
+
+
+
+def _send(f, obj):
+	f.write(json.dumps(obj) + '\n')
+	f.flush()
+
+
+def _receive(f):
+	line = f.readline()
+	if not line:
+		return None
+	return json.loads(line)
+
+
+def _toUnicode(s):
+	if isinstance(s, unicode):
+		return s
+	return s.decode('utf-8', 'replace')
+
+
+
+class _RequestHandler(SocketServer.StreamRequestHandler):
+	def handle(self):
+		# the request was already read and prepared by CompileServer.process_request
+		argv, cwd = self.server.currentRequest
+
+		status, out, err = self.server.runCompiler(argv, cwd)
+		_send(self.wfile, {'status': status, 'stdout': _toUnicode(out), 'stderr': _toUnicode(err)})
+
+
+
+class CompileServer(SocketServer.ForkingMixIn, SocketServer.UnixStreamServer):
+	''' long running compiler process; keeps the compiler modules and the annotated modules loaded between compile requests
+
+	Every compile request is handled by a child forked from the server, so the tasks of a parallel build are compiled
+	in parallel. The children start with everything the server has loaded: the compiler modules imported before
+	serving and the server's module caches. Modules annotated by a child are lost when it exits, so the children store
+	them as interface files; before forking the next child the server loads the new interface files into its own
+	caches (prepareFunction). Like in a single compiler run cached modules are only used while the file stamps of
+	their sources are unchanged.
+	'''
+
+	def __init__(self, socketPath, compileFunction, prepareFunction=None):
+		''' compileFunction(argv, moduleCaches) must behave like the main function of the exoself driver
+
+		prepareFunction(argv, moduleCaches) is called by the server before forking a child for a request; it returns the
+		argv the child is started with. Errors are ignored, the child reports them to the client.
+		'''
+		if os.path.exists(socketPath):
+			if isServerRunning(socketPath):
+				raise RuntimeError('a compile server is already listening on %s' % socketPath)
+			os.unlink(socketPath) # stale socket of a crashed server
+
+		oldUmask = os.umask(0077) # only the owner may send compile requests
+		try:
+			SocketServer.UnixStreamServer.__init__(self, socketPath, _RequestHandler)
+		finally:
+			os.umask(oldUmask)
+
+		self.socketPath = socketPath
+		self.stopRequested = False
+		self.currentRequest = None # (argv, cwd) of the request handled by a child
+		self._compileFunction = compileFunction
+		self._prepareFunction = prepareFunction
+		self._moduleCaches = {} # the compile function stores its module caches here
+
+
+	def process_request(self, request, clientAddress):
+		# the request is read before forking: a shutdown request must stop the server itself, not a child
+		f = request.makefile('rb')
+		message = _receive(f)
+		f.close()
+
+		if message and message.get('command') == 'shutdown':
+			f = request.makefile('wb')
+			_send(f, {'status': 0, 'stdout': '', 'stderr': ''})
+			f.close()
+			self.stopRequested = True
+			message = None
+
+		if not message:
+			self.close_request(request)
+			return
+
+		# json returns unicode strings, but the compiler expects byte strings like in sys.argv
+		argv = [x.encode('utf-8') for x in message['argv']]
+		cwd = message['cwd'].encode('utf-8')
+
+		self.currentRequest = (self.prepareRequest(argv, cwd), cwd)
+		SocketServer.ForkingMixIn.process_request(self, request, clientAddress)
+
+
+	def prepareRequest(self, argv, cwd):
+		''' runs the prepare function in the server process; returns the argv of the child '''
+		if not self._prepareFunction:
+			return argv
+
+		oldCwd = os.getcwd()
+		oldStdout = sys.stdout
+		oldStderr = sys.stderr
+		sys.stdout = sys.stderr = StringIO() # option parser errors are reported by the child
+		try:
+			try:
+				os.chdir(cwd)
+				return self._prepareFunction(argv, self._moduleCaches)
+			except (SystemExit, Exception):
+				return argv
+		finally:
+			sys.stdout = oldStdout
+			sys.stderr = oldStderr
+			os.chdir(oldCwd)
+
+
+	def runCompiler(self, argv, cwd):
+		oldCwd = os.getcwd()
+		oldStdout = sys.stdout
+		oldStderr = sys.stderr
+		sys.stdout = StringIO()
+		sys.stderr = StringIO()
+		try:
+			try:
+				os.chdir(cwd)
+				status = self._compileFunction(argv, self._moduleCaches)
+			except SystemExit, e:
+				# option parser errors
+				status = e.code
+				if not isinstance(status, int):
+					if status:
+						print >> sys.stderr, status
+					status = 1
+			except Exception:
+				traceback.print_exc()
+				status = 1
+
+			out = sys.stdout.getvalue()
+			err = sys.stderr.getvalue()
+		finally:
+			sys.stdout = oldStdout
+			sys.stderr = oldStderr
+			os.chdir(oldCwd)
+
+		return (status, out, err)
+
+
+	def serve(self):
+		try:
+			while not self.stopRequested:
+				self.handle_request()
+		finally:
+			self.server_close()
+			if os.path.exists(self.socketPath):
+				os.unlink(self.socketPath)
+
+
+
+def _connect(socketPath):
+	s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	try:
+		s.connect(socketPath)
+	except socket.error:
+		s.close()
+		raise
+	return s
+
+
+def _request(socketPath, request):
+	s = _connect(socketPath)
+	try:
+		f = s.makefile('rw')
+		_send(f, request)
+		response = _receive(f)
+		f.close()
+	finally:
+		s.close()
+
+	if response is None:
+		raise socket.error('compile server closed the connection')
+
+	return (response['status'], response['stdout'], response['stderr'])
+
+
+def isServerRunning(socketPath):
+	try:
+		s = _connect(socketPath)
+	except socket.error:
+		return False
+
+	s.close()
+	return True
+
+
+def compileRemote(socketPath, argv, cwd=None):
+	''' sends a compile request to a running server; returns (status, stdout, stderr) of the compiler
+
+	raises socket.error if no server is listening on socketPath
+	'''
+	if cwd is None:
+		cwd = os.getcwd()
+
+	return _request(socketPath, {'argv': list(argv), 'cwd': os.path.abspath(cwd)})
+
+
+def stopServer(socketPath):
+	_request(socketPath, {'command': 'shutdown'})
+
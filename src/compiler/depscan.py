@@ -0,0 +1,175 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# finds the modules imported by a source file without parsing it
+#
+# Only the tokens needed to recognize 'from module import *' are extracted, so this is much faster than building the
+# AST and does not need any other part of the compiler. The build system uses it in-process to find dependencies.
+
+import os
+import re
+
+
+# comments and strings are matched, so their contents are never mistaken for import statements
+_tokenRE = re.compile(r'''
+	(?P<comment>(?:\#|//)[^\n\r]*|/\*.*?\*/)
+	|(?P<string>[a-zA-Z]*r"[^"]*")
+	|(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)
+	|(?P<number>[0-9][0-9a-zA-Z_]*(?:\.[0-9][0-9a-zA-Z_]*)?)
+	|(?P<dot>\.)
+	|(?P<star>\*)
+	''', re.DOTALL | re.VERBOSE)
+
+
+def scanImports(source):
+	''' returns the names of all modules imported by source in order of appearance '''
+	if 'import' not in source:
+		return []
+
+	# all other tokens are irrelevant, so they are ignored by finditer
+	tokens = []
+	for m in _tokenRE.finditer(source):
+		kind = m.lastgroup
+		if kind == 'comment':
+			continue
+		tokens.append((kind, m.group(kind)))
+
+	# from DOT* NAME (DOT NAME)* import STAR
+	imports = []
+	i = 0
+	n = len(tokens)
+	while i < n:
+		if tokens[i] != ('name', 'from'):
+			i += 1
+			continue
+
+		j = i + 1
+		name = []
+		while j < n and tokens[j][0] == 'dot':
+			name.append('.')
+			j += 1
+
+		while j < n and tokens[j][0] == 'name' and tokens[j][1] != 'import':
+			name.append(tokens[j][1])
+			j += 1
+			if j + 1 < n and tokens[j][0] == 'dot' and tokens[j + 1][0] == 'name':
+				name.append('.')
+				j += 1
+			else:
+				break
+
+		if name and name[-1] != '.' and tokens[j:j + 2] == [('name', 'import'), ('star', '*')]:
+			imports.append(''.join(name))
+			i = j + 2
+		else:
+			i += 1
+
+	return imports
+
+
+def resolveModule(moduleName, importingFilename, searchPaths):
+	''' returns the absolute filename of the module imported by importingFilename; the file does not have to exist '''
+	assert(os.path.isabs(importingFilename))
+
+	modPath = moduleName
+	if modPath.startswith('.'):
+		modPath = modPath.split('.')
+		if modPath[0] == '':
+			modPath.pop(0)
+
+		path, ignored = os.path.split(importingFilename)
+		for i in range(len(modPath)):
+			if modPath[i] != '':
+				break
+
+			path, ignored = os.path.split(path)
+		toImport = os.path.join(path, *modPath[i:]) + '.es'
+	else:
+		# TODO implement support for importing 'directories' --> if target path is a directory import the file named '__init.es' or something like that instead
+		toImport = ''
+		for sp in searchPaths:
+			p = os.path.join(sp, *modPath.split('.')) + '.es'
+			if os.path.exists(p):
+				if os.path.isfile(p):
+					toImport = p
+					break
+
+	return os.path.abspath(toImport)
+
+
+
+# maps absolute filenames to (file stamp, imported module names); files are only scanned again when they change.
+# The names are resolved on every call: a module created later can shadow a module further along the search paths.
+_scanned = {}
+def findImportedFiles(filename, searchPaths):
+	''' returns the absolute filenames of all existing modules imported directly by the file filename '''
+	assert(os.path.isabs(filename))
+
+	try:
+		st = os.stat(filename)
+	except OSError:
+		return []
+	stamp = (st.st_mtime, st.st_size)
+
+	entry = _scanned.get(filename, None)
+	if entry and entry[0] == stamp:
+		moduleNames = entry[1]
+	else:
+		f = file(filename)
+		source = f.read()
+		f.close()
+
+		moduleNames = scanImports(source)
+		_scanned[filename] = (stamp, moduleNames)
+
+	l = []
+	for x in moduleNames:
+		fn = resolveModule(x, filename, searchPaths)
+		if os.path.isfile(fn) and fn not in l:
+			l.append(fn)
+	return l
+
+
+def scanDependencies(filename, searchPaths):
+	''' returns the absolute filenames of all existing modules imported directly or indirectly by the file filename '''
+	assert(os.path.isabs(filename))
+
+	dependencies = []
+	seen = set([filename])
+	todo = [filename]
+	for fn in todo: # todo grows while iterating
+		for x in findImportedFiles(fn, searchPaths):
+			if x not in seen:
+				seen.add(x)
+				dependencies.append(x)
+				todo.append(x)
+
+	return dependencies
+
@@ -34,7 +34,7 @@ from tree import Tree, TreeType
 
 
 def _desugarLoopElse(tree):
-	if not (tree.type == TreeType.WHILE and len(tree.children) == 3):
+	if len(tree.children) != 3:
 		return
 
 	# transform a (WHILE (expr blockBody blockElse)) to (IF (expr (BLOCK (WHILE (expr blockBody)) blockElse)))
@@ -68,75 +68,14 @@ def _desugarLoopElse(tree):
 
 
 def _fixPackageAndModuleNames(tree):
-	if tree.type == TreeType.PACKAGE or tree.type == TreeType.IMPORTALL:
-		newText = [x.text for x in tree.children]
-		del tree.children[1:]
-		tree.children[0].text = u''.join(newText)
-
-
-def _desugarMultiAssign(tree):
-	# special action! we traverse the tree internally!
-	assert(tree.type != TreeType.ASSIGN and 'desugaring of top level assignments is not possible. The assignment node MUST be a child node!')
-
-
-	# transform assignments in the form
-	#     a = b = c = expr;
-	# to
-	#     c = expr; b = c; a = b;
-	# instead of
-	#     c = expr; b = expr; a = expr;
-	# this form avoids any problems related to already existing variables with different types
-
-
-	i = 0
-	while i < len(tree.children): # len must be calculated after every loop again!
-		c = tree.children[i]
-		if c.type == TreeType.ASSIGN and c.getChildCount() > 2:
-			# fix this node
-
-			# create new nodes
-			nameNodes = c.children[:-1]
-			exprNode = c.children[-1]
-
-			nNames = len(nameNodes)
-			newAssignNodes = []
-
-			node = c.copy(False)
-			node.children = [nameNodes[-1].copy(True), exprNode.copy(True)]
-			newAssignNodes.append(node)
-
-			for j in range(nNames - 2, -1, -1):# start with assignment on the right side working towards the left side
-				variableNode = nameNodes[j + 1].copy(True)
-
-				node = c.copy(False)
-				node.children = [nameNodes[j].copy(True), variableNode]
-				newAssignNodes.append(node)
-
-
-			# now replace tree.children[i] with newAssignNodes
-			a = tree.children[:i]
-			b = tree.children[i + 1:]
-			tree.children = a
-			tree.children.extend(newAssignNodes)
-			tree.children.extend(b)
-
-			# do not skip ahead! then the assert below will check everything
-			continue
-
-
-		if c.text == u'=':
-			assert(c.getChildCount() == 2)
-		else:
-			_desugarMultiAssign(c)
-		i += 1
+	newText = [x.text for x in tree.children]
+	del tree.children[1:]
+	tree.children[0].text = u''.join(newText)
 
 
 def _desugarNegativeNumberConstants(tree):
 	# problem: numbers like -32768h are represented as a unary MINUS node and a INTEGER_CONSTANT node with type int16. But the 32768h is not a int16 number!
 
-	if tree.type != TreeType.MINUS:
-		return
-
 	if len(tree.children) != 1:
 		return
 
@@ -156,33 +95,24 @@ def _desugarNegativeNumberConstants(tree):
 def _desugarDereference(tree):
 	# DEREFERENCE nodes must have at most 2 children: the pointer expression and optionally an offset
 
-	if tree.type != TreeType.DEREFERENCE:
-		return
-
 	if len(tree.children) <= 2:
 		return
 
 	# x[3][2][1] gets parsed as (DEREFERENCE x 3 2 1)
 	# and it must become (DEREFERENCE (DEREFERENCE (DEREFERENCE x, 3), 2), 1)
 
-	pointer = tree.children[0]
-	offsetsWithoutLast = tree.children[1:-1]
-	lastOffset = tree.children[-1]
-
+	children = tree.children
 	tree.children = []
 
 	current = tree.copy(False)
-	current.children = [pointer, offsetsWithoutLast[0]]
-	offsetsWithoutLast = offsetsWithoutLast[1:]
-	while offsetsWithoutLast:
-
+	current.children = [children[0], children[1]]
+	for i in range(2, len(children) - 1):
 		new = tree.copy(False)
-		new.children = [current, offsetsWithoutLast[0]]
+		new.children = [current, children[i]]
 
 		current = new
-		offsetsWithoutLast = offsetsWithoutLast[1:]
 
-	tree.children = [current, lastOffset]
+	tree.children = [current, children[-1]]
 
 
 
@@ -192,9 +122,6 @@ def _desugarFunctionOperator(tree):
 	# this must be transformed to normal function calls
 	# h(g(f(W, X), Y), Z)
 
-	if tree.type != TreeType.FUNCTIONOPERATOR:
-		return
-
 	tree.type = TreeType.CALLFUNC
 	tree.text = u'CALLFUNC'
 
@@ -205,81 +132,129 @@ def _desugarFunctionOperator(tree):
 		# changing node type was enough
 		return
 
-	names = tree.children[:nNames]
-	args = tree.children[nNames:-1]
-	lastArg = tree.children[-1]
-
+	children = tree.children
+	names = children[:nNames]
+	args = children[nNames:]
 
 	tree.children = []
 
 	current = tree.copy(False)
 	current.children = [names[0], args[0], args[1]]
-	names = names[1:]
-	args = args[2:]
-
-	while args:
+	for i in range(1, nNames - 1):
 		new = tree.copy(False)
-		new.children = [names[0], current, args[0]]
+		new.children = [names[i], current, args[i + 1]]
 
 		current = new
-
-		names = names[1:]
-		args = args[1:]
-	tree.children = [names[0], current, lastArg]
+	tree.children = [names[-1], current, args[-1]]
 
 
-def _desugarMultiDefVar(tree):
-	# transforms ^(DEFVAR NAME+ type_name) to multiple DEFVAR nodes with each one name, order is preserved
-
-	if not tree.children:
-		return
+def _desugarMultiAssign(tree):
+	# transform assignments in the form
+	#     a = b = c = expr;
+	# to
+	#     c = expr; b = c; a = b;
+	# instead of
+	#     c = expr; b = expr; a = expr;
+	# this form avoids any problems related to already existing variables with different types
 
-	i = 0
-	while i < len(tree.children):
-		x = tree.children[i]
-		if x.type == TreeType.DEFVAR and len(x.children) > 2:
-			firstName = x.children[0]
-			names = x.children[1:-1]
-			typeName = x.children[-1]
-			x.children = [firstName, typeName]
+	if len(tree.children) <= 2:
+		return None
 
-			i += 1
+	nameNodes = tree.children[:-1]
+	exprNode = tree.children[-1]
+	tree.children = []
 
-			for name in names:
-				newNode = x.copy(False)
-				newNode.children = [name, typeName.copy(True)]
-				tree.children.insert(i, newNode)
+	node = tree.copy(False)
+	node.children = [nameNodes[-1], exprNode]
+	newAssignNodes = [node]
 
-				i += 1
-		else:
-			i += 1
-	assert(i == len(tree.children))
+	for j in range(len(nameNodes) - 2, -1, -1):# start with assignment on the right side working towards the left side
+		variableNode = nameNodes[j + 1].copy(True)
 
+		node = tree.copy(False)
+		node.children = [nameNodes[j], variableNode]
+		newAssignNodes.append(node)
 
+	return newAssignNodes
 
-# actions get called for every node
-_actions = [_desugarLoopElse, _fixPackageAndModuleNames, _desugarNegativeNumberConstants, _desugarDereference, _desugarFunctionOperator, _desugarMultiDefVar]
-# special actions traverse the tree themselves
-_specialActions = [_desugarMultiAssign]
 
-def _desugarActions(tree):
-	for a in _actions:
-		a(tree)
+def _desugarMultiDefVar(tree):
+	# transforms ^(DEFVAR NAME+ type_name) to multiple DEFVAR nodes with each one name, order is preserved
 
+	if len(tree.children) <= 2:
+		return None
+
+	names = tree.children[:-1]
+	typeName = tree.children[-1]
+	tree.children = [names[0], typeName]
+
+	newNodes = [tree]
+	for name in names[1:]:
+		newNode = tree.copy(False)
+		newNode.children = [name, typeName.copy(True)]
+		newNodes.append(newNode)
+
+	return newNodes
+
+
+
+# rewrites and the node types they apply to
+#     node rewrites change a node in place
+#     list rewrites get a child node and return a list of nodes replacing it in its parent, or None to keep it
+_nodeRewrites = [
+	(_desugarLoopElse, ['WHILE']),
+	(_fixPackageAndModuleNames, ['PACKAGE', 'IMPORTALL']),
+	(_desugarNegativeNumberConstants, ['MINUS']),
+	(_desugarDereference, ['DEREFERENCE']),
+	(_desugarFunctionOperator, ['FUNCTIONOPERATOR']),
+	]
+_listRewrites = [
+	(_desugarMultiAssign, ['ASSIGN']),
+	(_desugarMultiDefVar, ['DEFVAR']),
+	]
+
+def _buildDispatchTable(rewrites):
+	table = {}
+	for f, types in rewrites:
+		for x in types:
+			table.setdefault(getattr(TreeType, x), []).append(f)
+	return table
+
+_nodeRewriteTable = _buildDispatchTable(_nodeRewrites)
+_listRewriteTable = _buildDispatchTable(_listRewrites)
+
+
+def _rewriteChildren(tree):
+	children = []
 	for c in tree.children:
-		_desugarActions(c)
-
-
-	return tree
+		replacement = None
+		for f in _listRewriteTable.get(c.type, ()):
+			replacement = f(c)
+			if replacement is not None:
+				break
+
+		if replacement is None:
+			children.append(c)
+		else:
+			children.extend(replacement)
+	tree.children = children
 
 
 def desugar(tree):
-	_desugarActions(tree)
-
-	for sa in _specialActions:
-		sa(tree)
-
+	# one pass over all nodes with an explicit stack, so deeply nested trees do not hit the recursion limit
+	nodeRewriteTable = _nodeRewriteTable
+	listRewriteTable = _listRewriteTable
 
+	todo = [tree]
+	while todo:
+		t = todo.pop()
 
+		for f in nodeRewriteTable.get(t.type, ()):
+			f(t)
 
+		for c in t.children:
+			if c.type in listRewriteTable:
+				_rewriteChildren(t)
+				break
 
+		todo.extend(t.children)
@@ -0,0 +1,106 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# caches the unpacked DFA tables of the lexer and parser generated by ANTLR
+#
+# The generated modules unpack their run length encoded tables every time they are imported. Importing this module
+# replaces DFA.unpack by a version, which takes the tables from a cache file, so they are unpacked only once.
+# Just import this module before importing the generated modules.
+
+import setuppaths
+import os
+import atexit
+import marshal
+import tempfile
+from antlr3.dfa import DFA
+
+
+_cacheFilename = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'grammar', 'exoself.dfacache')
+_tables = {} # maps packed strings to unpacked tables
+_used = {} # tables used by this process; only these are written back
+_modified = False
+_unpack = DFA.unpack
+
+
+def _load():
+	global _tables
+
+	try:
+		f = file(_cacheFilename, 'rb')
+		try:
+			tables = marshal.load(f)
+		finally:
+			f.close()
+	except (IOError, EOFError, ValueError, TypeError):
+		return # no cache yet or a broken one, which gets replaced
+
+	if isinstance(tables, dict):
+		_tables = tables
+
+
+def _save():
+	if not _modified:
+		return
+
+	# several compiler processes may start at the same time: write to a temporary file and atomically replace the old one
+	try:
+		fd, tmpFilename = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(_cacheFilename))
+		try:
+			f = os.fdopen(fd, 'wb')
+			try:
+				marshal.dump(_used, f)
+			finally:
+				f.close()
+			os.rename(tmpFilename, _cacheFilename)
+		except:
+			os.remove(tmpFilename)
+			raise
+	except (IOError, OSError):
+		pass # the cache only speeds up startup
+
+
+def _cachedUnpack(cls, string):
+	global _modified
+
+	# the tables are never modified, so they can be shared
+	table = _tables.get(string, None)
+	if table is None:
+		table = _unpack(string)
+		_tables[string] = table
+		_modified = True
+	_used[string] = table
+
+	return table
+
+
+_load()
+DFA.unpack = classmethod(_cachedUnpack)
+atexit.register(_save)
+
@@ -93,6 +93,13 @@ class ESFunction(object):
 		return '%s (%s, %s): %s; linkage=%s mangling=%s' % (self.name, self.package, self.module, self.esType, self.linkage, self.mangling)
 
 
+	def __getstate__(self):
+		# llvm references belong to a single llvm module and can not be pickled
+		d = self.__dict__.copy()
+		d.pop('llvmRef', None)
+		return d
+
+
 	mangledName = property(mangleName)
 
 
@@ -29,7 +29,11 @@
 #
 
 
-from llvm.core import *
+
+def _getElementaryType(name):
+	import estypesystem # circular dependency
+
+	return estypesystem.elementaryTypes[unicode(name)]
 
 
 
@@ -179,7 +183,18 @@ class ESType(object):
 
 
 
+	def __reduce_ex__(self, protocol):
+		# estypesystem looks up elementary types by identity: keep them unique when pickling or copying
+		if self.payload[0] == 'elementary' and self.payload[1] != 'none':
+			return (_getElementaryType, (self.payload[1],))
+
+		return object.__reduce_ex__(self, protocol)
+
+
+
 	def toLLVMType(self):
+		from llvm.core import Type, TypeHandle # llvm-py is only loaded when generating code
+
 		if len(self.parents) > 1:
 			assert(self.payload[0] in ['struct', 'function'])
 		if not self.parents:
@@ -69,6 +69,13 @@ class ESVariable(object):
 		return True
 
 		
+	def __getstate__(self):
+		# llvm references belong to a single llvm module and can not be pickled
+		d = self.__dict__.copy()
+		d.pop('llvmRef', None)
+		return d
+
+
 	llvmType = property(toLLVMType)
 	esType = property(getESType)
 
@@ -0,0 +1,83 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+from depscan import findImportedFiles
+
+
+
+def buildImportGraph(filenames, searchPaths):
+	''' maps every file to the existing files it imports directly '''
+	graph = {}
+	for fn in filenames:
+		graph[fn] = findImportedFiles(fn, searchPaths)
+
+	return graph
+
+
+def getInputImports(filenames, graph):
+	''' maps every file of filenames to the other files of filenames it imports directly
+
+	Only these imports constrain the order of parallel compilation: a file is compiled after the input files it imports,
+	so it can reuse their interface files. All other files can be compiled at any time.
+	Imports closing a cycle are left out, so the result has no cycles; circular imports are reported by the type
+	annotator. Ties are broken by the order of filenames, so the result is deterministic.
+	'''
+	inputs = set(filenames)
+
+	imports = {}
+	for fn in filenames:
+		l = []
+		for x in graph.get(fn, []):
+			if x in inputs and x != fn and x not in l:
+				l.append(x)
+		imports[fn] = l
+
+	# depth first search; an import of a file which is still being visited closes a cycle
+	state = {} # maps files to 1 while they are visited and to 2 afterwards
+	for root in filenames:
+		if root in state:
+			continue
+
+		state[root] = 1
+		stack = [(root, iter(list(imports[root])))]
+		while stack:
+			fn, it = stack[-1]
+			for x in it:
+				if state.get(x) == 1:
+					imports[fn].remove(x)
+				elif x not in state:
+					state[x] = 1
+					stack.append((x, iter(list(imports[x]))))
+					break
+			else:
+				state[fn] = 2
+				stack.pop()
+
+	return imports
@@ -31,18 +31,16 @@
 import setuppaths
 
 import antlr3
+import dfacache # must be imported before the generated module
 import exoselfLexer
 
 
 
 class Lexer(exoselfLexer.exoselfLexer):
-	def __init__(self, inputStream, source=None):
+	def __init__(self, inputStream, source=None, errors=None):
 		exoselfLexer.exoselfLexer.__init__(self, inputStream)
 		self._source = source
-		if source:
-			self._sourceLines = source.splitlines()
-		else:
-			self._sourceLines = None
+		self._errors = errors # if a list is given, errors are appended as (line, column, message) instead of printed
 
 	def nextToken(self):
 		self.startPos = self.getCharPositionInLine()
@@ -50,6 +48,10 @@ class Lexer(exoselfLexer.exoselfLexer):
 		return t
 
 	def displayRecognitionError(self, tokenNames, e):
+		if self._errors is not None:
+			self._errors.append((e.line, e.charPositionInLine, self.getErrorMessage(e, tokenNames)))
+			return
+
 		if not e.line:
 			s = 'line ???:???: lexer error\n'
 		else:
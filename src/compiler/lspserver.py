@@ -0,0 +1,213 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# language server for editors (--lsp)
+#
+# Implements the part of the language server protocol needed to show errors while editing: the editor sends the whole
+# text of a document after every change and the server answers with the syntax and type errors of the module. Every
+# open document has its own AnalysisSession; all sessions share the imported modules.
+
+import os
+import sys
+import json
+import time
+import urllib
+import urlparse
+import traceback
+
+from session import AnalysisSession
+from modulecache import ModuleCache
+
+
+_TEXT_DOCUMENT_SYNC_FULL = 1
+_SEVERITY_ERROR = 1
+
+_METHOD_NOT_FOUND = -32601
+_INTERNAL_ERROR = -32603
+
+
+
+def uriToFilename(uri):
+	scheme, netloc, path, params, query, fragment = urlparse.urlparse(uri)
+	if scheme != 'file':
+		return None
+	return os.path.abspath(urllib.unquote(path))
+
+
+
+class LanguageServer(object):
+	''' answers language server protocol requests read from input, usually stdin, on output, usually stdout '''
+	def __init__(self, input, output, searchPaths, moduleCache=None, verbose=False):
+		self._input = input
+		self._output = output
+		self._searchPaths = searchPaths
+		if moduleCache is None:
+			moduleCache = ModuleCache()
+		self._moduleCache = moduleCache
+		self._verbose = verbose
+
+		self._sessions = {} # maps document uris to AnalysisSession instances
+		self._stopRequested = False
+		self._exitCode = None
+
+
+	def serve(self):
+		''' handles messages until the client sends exit; returns the exit code '''
+		# the compiler prints some messages; they must not get mixed into the protocol
+		oldStdout = sys.stdout
+		sys.stdout = sys.stderr
+		try:
+			while self._exitCode is None:
+				message = self._receive()
+				if message is None:
+					# client disappeared
+					return 1
+				self._handle(message)
+		finally:
+			sys.stdout = oldStdout
+
+		return self._exitCode
+
+
+	def _receive(self):
+		length = None
+		while True:
+			line = self._input.readline()
+			if not line:
+				return None
+			line = line.strip()
+			if not line:
+				break
+
+			k, v = line.split(':', 1)
+			if k.lower() == 'content-length':
+				length = int(v)
+
+		return json.loads(self._input.read(length))
+
+
+	def _send(self, message):
+		message['jsonrpc'] = '2.0'
+		data = json.dumps(message)
+		self._output.write('Content-Length: %d\r\n\r\n%s' % (len(data), data))
+		self._output.flush()
+
+
+	def _handle(self, message):
+		method = message.get('method', None)
+		params = message.get('params', {})
+		id = message.get('id', None)
+
+		handler = getattr(self, '_on_' + (method or '').replace('/', '_').replace('$', '_'), None)
+		if handler is None:
+			if id is not None:
+				self._send({'id': id, 'error': {'code': _METHOD_NOT_FOUND, 'message': 'method not supported: %s' % method}})
+			return
+
+		try:
+			result = handler(params)
+		except Exception:
+			traceback.print_exc()
+			if id is not None:
+				self._send({'id': id, 'error': {'code': _INTERNAL_ERROR, 'message': traceback.format_exc()}})
+			return
+
+		if id is not None:
+			self._send({'id': id, 'result': result})
+
+
+	def _on_initialize(self, params):
+		return {'capabilities': {'textDocumentSync': _TEXT_DOCUMENT_SYNC_FULL}, 'serverInfo': {'name': 'exoself'}}
+
+
+	def _on_initialized(self, params):
+		pass
+
+
+	def _on_shutdown(self, params):
+		self._stopRequested = True
+		return None
+
+
+	def _on_exit(self, params):
+		if self._stopRequested:
+			self._exitCode = 0
+		else:
+			self._exitCode = 1
+
+
+	def _on_textDocument_didOpen(self, params):
+		document = params['textDocument']
+		self._analyze(document['uri'], document['text'])
+
+
+	def _on_textDocument_didChange(self, params):
+		changes = params['contentChanges']
+		if changes:
+			# full synchronization: the last change holds the whole text
+			self._analyze(params['textDocument']['uri'], changes[-1]['text'])
+
+
+	def _on_textDocument_didClose(self, params):
+		uri = params['textDocument']['uri']
+		self._sessions.pop(uri, None)
+		self._publishDiagnostics(uri, [])
+
+
+	def _analyze(self, uri, text):
+		session = self._sessions.get(uri, None)
+		if session is None:
+			filename = uriToFilename(uri)
+			if filename is None:
+				return
+			session = self._sessions[uri] = AnalysisSession(filename, self._searchPaths, self._moduleCache)
+
+		t = time.time()
+		try:
+			diagnostics = session.update(text.encode('utf-8'))
+		except Exception, e:
+			# the previous diagnostics must not stay visible; the next change starts a new session
+			traceback.print_exc()
+			self._sessions.pop(uri, None)
+			diagnostics = [(1, 0, 'internal error: %s: %s' % (e.__class__.__name__, e))]
+		if self._verbose:
+			print >> sys.stderr, '%s: %d diagnostics in %.1f ms' % (session.filename, len(diagnostics), (time.time() - t) * 1000)
+
+		self._publishDiagnostics(uri, diagnostics)
+
+
+	def _publishDiagnostics(self, uri, diagnostics):
+		l = []
+		for line, column, message in diagnostics:
+			position = {'line': max(line - 1, 0), 'character': column}
+			end = {'line': max(line - 1, 0), 'character': column + 1}
+			l.append({'range': {'start': position, 'end': end}, 'severity': _SEVERITY_ERROR, 'source': 'exoself', 'message': message})
+
+		self._send({'method': 'textDocument/publishDiagnostics', 'params': {'uri': uri, 'diagnostics': l}})
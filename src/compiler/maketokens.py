@@ -0,0 +1,77 @@
+#!/usr/bin/python
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# generates a python module with the token IDs of the grammar from the .tokens file written by ANTLR
+# tree.py imports this module instead of importing the whole parser just to get the token IDs
+# usage: maketokens.py grammar/exoself.tokens grammar/exoselfTokens.py
+
+import sys
+
+
+def readTokens(filename):
+	''' returns a dict mapping token names to IDs; literals like '+' are skipped '''
+	tokens = {}
+
+	f = file(filename)
+	for line in f:
+		line = line.strip()
+		if not line or line.startswith("'"):
+			continue
+
+		name, id = line.rsplit('=', 1)
+		tokens[name] = int(id)
+	f.close()
+
+	return tokens
+
+
+def writeTokenModule(tokens, filename):
+	s = []
+	s.append('# generated by maketokens.py; do not edit')
+	s.append('')
+	s.append('tokenIDs = {')
+	for name in sorted(tokens):
+		s.append('\t%r: %d,' % (name, tokens[name]))
+	s.append('}')
+	s.append('')
+
+	f = file(filename, 'wt')
+	f.write('\n'.join(s))
+	f.close()
+
+
+if __name__ == '__main__':
+	if len(sys.argv) != 3:
+		print 'usage: %s input.tokens output.py' % sys.argv[0]
+		sys.exit(1)
+
+	writeTokenModule(readTokens(sys.argv[1]), sys.argv[2])
+
@@ -0,0 +1,188 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# memory statistics for --mem-report
+#
+# The peak memory usage per phase is recorded by timereport.PhaseTimer. This module provides the measurement and
+# statistics about the data structures of the compiler: how many AST nodes, types, symbols and LLVM values exist and
+# which attributes of the AST nodes need the most memory.
+
+import sys
+import resource
+
+
+
+def getPeakMemory():
+	''' returns the peak resident set size of this process in bytes
+
+	This is the peak since the process started (ru_maxrss), so it never decreases: memory freed after a phase does
+	not show up in the value of later phases.
+	'''
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	if sys.platform == 'darwin':
+		return peak # bytes on Mac OS X
+	return peak * 1024 # kilobytes on Linux
+
+
+
+class ASTStatistics(object):
+	''' counts the objects referenced by annotated ASTs and the memory used by attributes of the AST nodes
+
+	Objects shared by several nodes, like types and node texts, are counted once per module, by the first node
+	referencing them. Sizes are shallow except for symbol tables, which include their dicts and overload lists but
+	not the symbols.
+	'''
+
+	def __init__(self):
+		self.counts = {} # maps descriptions to numbers of objects
+		self.attributes = {} # maps attribute names of AST nodes to [number of nodes with this attribute, bytes]
+
+
+	def _count(self, name, n=1):
+		self.counts[name] = self.counts.get(name, 0) + n
+
+
+	def addModule(self, ast, llvmModule=None):
+		''' adds the objects of the annotated module ast and the llvm module generated from it '''
+		from estype import ESType
+		from esfunction import ESFunction
+		from esvariable import ESVariable
+		from symboltable import SymbolTable
+
+		self._count('modules')
+
+		esTypes = {} # maps ids of ESType instances to the instances
+		def addESType(t):
+			todo = [t]
+			while todo:
+				t = todo.pop()
+				if id(t) in esTypes:
+					continue
+				esTypes[id(t)] = t
+				todo.extend(t.parents)
+
+		seen = set() # ids of the attribute values already counted in this module
+
+		todo = [ast]
+		while todo:
+			node = todo.pop()
+			todo.extend(node.children)
+
+			self._count('AST nodes')
+
+			x = self.attributes.setdefault('(node)', [0, 0])
+			x[0] += 1
+			x[1] += sys.getsizeof(node)
+
+			for k, v in node.iterAttributes():
+				x = self.attributes.setdefault(k, [0, 0])
+				x[0] += 1
+				if id(v) in seen:
+					continue
+				seen.add(id(v))
+
+				if isinstance(v, SymbolTable):
+					x[1] += v.getSize()
+				else:
+					x[1] += sys.getsizeof(v)
+
+				if isinstance(v, ESType):
+					addESType(v)
+				elif isinstance(v, SymbolTable):
+					self._count('symbol tables')
+					for symbols in v.getAllSymbols().itervalues():
+						if not isinstance(symbols, list):
+							symbols = [symbols]
+
+						for symbol in symbols:
+							self._count('symbol table entries')
+							if isinstance(symbol, ESType):
+								addESType(symbol)
+							elif isinstance(symbol, (ESFunction, ESVariable)):
+								addESType(symbol.esType)
+
+				if k in ['llvmValue', 'llvmRef']:
+					self._count('LLVM values referenced by AST nodes')
+
+		self._count('ESType instances', len(esTypes))
+
+		if llvmModule:
+			# llvm-py returns generators
+			for gv in llvmModule.global_variables:
+				self._count('LLVM global variables')
+			for f in llvmModule.functions:
+				self._count('LLVM functions')
+				for bb in f.basic_blocks:
+					self._count('LLVM basic blocks')
+					for instr in bb.instructions:
+						self._count('LLVM instructions')
+
+
+	def merge(self, other):
+		for k, v in other.counts.iteritems():
+			self._count(k, v)
+
+		for k, v in other.attributes.iteritems():
+			x = self.attributes.setdefault(k, [0, 0])
+			x[0] += v[0]
+			x[1] += v[1]
+
+
+	def formatReport(self, numAttributes=10):
+		s = []
+		s.append('%-48s %12s' % ('objects', 'count'))
+		for k in sorted(self.counts):
+			s.append('%-48s %12d' % (k, self.counts[k]))
+
+		s.append('')
+		s.append('%-48s %12s %12s' % ('AST node attributes (shared objects once)', 'nodes', 'size [KB]'))
+		l = sorted(self.attributes.iteritems(), key=lambda x: x[1][1], reverse=True)
+		for k, v in l[:numAttributes]:
+			s.append('%-48s %12d %12.1f' % (k, v[0], v[1] / 1024.0))
+
+		return '\n'.join(s)
+
+
+
+_statistics = None
+
+def getStatistics():
+	''' returns the ASTStatistics installed by setStatistics or None '''
+	return _statistics
+
+
+def setStatistics(statistics):
+	''' installs statistics for all modules compiled from now on; returns the previous statistics '''
+	global _statistics
+
+	previous = _statistics
+	_statistics = statistics
+	return previous
+
@@ -0,0 +1,311 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+import os
+
+import estypesystem
+from esfunction import ESFunction
+from esvariable import ESVariable
+from symboltable import SymbolTable
+from moduleinterface import hashFile, hashSource, saveInterface, loadInterface, listInterfaces, getInterfaceModule
+
+
+
+def getFileStamp(filename):
+	''' cheap fingerprint of a file; changes whenever the file is modified '''
+	try:
+		st = os.stat(filename)
+	except OSError:
+		return None
+
+	return (st.st_mtime, st.st_size)
+
+
+def getExportedSymbols(symbolTable):
+	''' returns a list of (name, symbol) tuples of all symbols an importing module gets from symbolTable '''
+	l = []
+	for k, v in symbolTable.getAllSymbols().items():
+		if isinstance(v, list):
+			# ESFunction's
+			for x in v:
+				assert(isinstance(x, ESFunction))
+				l.append((k, x))
+		elif isinstance(v, ESVariable):
+			# ESVariable's
+			l.append((k, v))
+		# TODO add ESType's
+
+	return l
+
+
+def isAlreadyImported(symbolTable, name, symbol):
+	''' True, if symbol was already added to symbolTable, for example through another module of a diamond shaped import graph '''
+	prevDef = symbolTable.findSymbol(name)
+
+	return prevDef is symbol or (isinstance(prevDef, list) and symbol in prevDef)
+
+
+def mergeStatistics(stats, other):
+	''' adds the statistics other to stats; both were returned by ModuleCache.getStatistics '''
+	for fn, counts in other.iteritems():
+		if fn in stats:
+			stats[fn] = [a + b for a, b in zip(stats[fn], counts)]
+		else:
+			stats[fn] = list(counts)
+
+
+def formatStatistics(stats):
+	''' returns a human readable report of statistics returned by ModuleCache.getStatistics '''
+	totals = [0, 0, 0]
+	for counts in stats.itervalues():
+		totals = [a + b for a, b in zip(totals, counts)]
+
+	s = []
+	s.append('import statistics')
+	s.append('    hits: %d (in memory: %d, interface files: %d)' % (totals[0] + totals[1], totals[0], totals[1]))
+	s.append('    misses: %d' % totals[2])
+	if stats:
+		s.append('    %8s %8s %8s  module' % ('memory', 'iface', 'misses'))
+		for fn in sorted(stats):
+			counts = stats[fn]
+			s.append('    %8d %8d %8d  %s' % (counts[0], counts[1], counts[2], fn))
+
+	return '\n'.join(s)
+
+
+
+class CachedModule(object):
+	''' everything an importing module needs to know about an already annotated module '''
+
+	def __init__(self, filename, symbolTable, dependencies, stamps, hashes=None):
+		assert(os.path.isabs(filename))
+
+		self.filename = filename
+		self.symbolTable = symbolTable
+		self.dependencies = dependencies
+		self.stamps = stamps # maps the filename of this module and of all modules imported directly or indirectly to their file stamps
+		self.hashes = hashes # like stamps, but maps to md5 hashes of the sources; only available when using interface files
+
+
+	def isUpToDate(self):
+		for fn, stamp in self.stamps.iteritems():
+			if getFileStamp(fn) != stamp:
+				return False
+
+		return True
+
+
+
+class ModuleCache(object):
+	''' stores annotated modules, so a module imported by several compilation units gets only processed once
+
+	Modules are forgotten as soon as their source or the source of any imported module changes.
+	Lookups are counted per module, see getStatistics.
+	If interfaceDir is given, modules are additionally stored as interface files (.esi) in this directory, so they can
+	be reused by later compiler runs.
+	'''
+
+	def __init__(self, interfaceDir=None):
+		self._modules = {} # maps absolute filenames to CachedModule instances
+		self._interfaceDir = interfaceDir
+		self._stats = {} # maps absolute filenames to [hits in memory, hits in interface files, misses]
+		self._interfaceStamps = {} # maps interface files to their file stamps when loadInterfaces last looked at them
+
+
+	def findModule(self, filename):
+		''' returns the CachedModule of filename or None, if the module must be processed again '''
+		cm, where = self._findModule(filename)
+
+		counts = self._stats.setdefault(filename, [0, 0, 0])
+		counts[where] += 1
+
+		return cm
+
+
+	def _findModule(self, filename):
+		# returns the module and the index of the counter which must be incremented
+		assert(os.path.isabs(filename))
+
+		cm = self._modules.get(filename, None)
+		if cm and not cm.isUpToDate():
+			del self._modules[filename]
+			cm = None
+		if cm:
+			return cm, 0
+
+		if self._interfaceDir:
+			cm = self._loadInterface(filename)
+			if cm:
+				return cm, 1
+
+		return None, 2
+
+
+	def addModule(self, filename, ast, source=None):
+		''' ast must be the root node of a module which was annotated by ASTTypeAnnotator; source is the code ast was built from '''
+		assert(os.path.isabs(filename))
+
+		stamps = {}
+		stamps[filename] = getFileStamp(filename)
+		for x in ast.dependencies:
+			# imported modules were just annotated, so they should be available
+			cm = self._modules.get(x, None)
+			if cm:
+				stamps.update(cm.stamps)
+			else:
+				stamps[x] = getFileStamp(x)
+
+		cm = CachedModule(filename, ast.symbolTable, ast.dependencies, stamps)
+		self._modules[filename] = cm
+
+		if self._interfaceDir:
+			self._saveInterface(cm, source)
+
+		return cm
+
+
+	def loadInterfaces(self):
+		''' loads the modules of all up to date interface files in the interface directory; returns the number of loaded modules
+
+		The compile server uses this to keep the modules annotated by the processes it forked in memory.
+		Lookups are not counted in the statistics.
+		'''
+		if not self._interfaceDir:
+			return 0
+
+		n = 0
+		for x in listInterfaces(self._interfaceDir):
+			stamp = getFileStamp(x)
+			if self._interfaceStamps.get(x, None) == stamp:
+				continue # unchanged since the last call
+			self._interfaceStamps[x] = stamp
+
+			filename = getInterfaceModule(x)
+			if not filename:
+				continue
+
+			cm, where = self._findModule(filename)
+			if where == 1:
+				n += 1
+
+		return n
+
+
+	def clear(self):
+		self._modules = {}
+
+
+	def getStatistics(self):
+		''' returns a dict mapping filenames of looked up modules to [hits in memory, hits in interface files, misses] '''
+		stats = {}
+		mergeStatistics(stats, self._stats)
+
+		return stats
+
+
+	def resetStatistics(self):
+		self._stats = {}
+
+
+	def _saveInterface(self, cm, source):
+		hashes = {}
+		if source is None:
+			hashes[cm.filename] = hashFile(cm.filename)
+		else:
+			hashes[cm.filename] = hashSource(source)
+
+		# symbols coming from imported modules are stored in the interface files of these modules
+		imported = set()
+		for x in cm.dependencies:
+			dep = self._modules.get(x, None)
+			if not dep or dep.hashes is None:
+				# can not tell which symbols are defined by this module
+				return
+
+			hashes.update(dep.hashes)
+			for name, symbol in getExportedSymbols(dep.symbolTable):
+				imported.add(id(symbol))
+		cm.hashes = hashes
+
+		symbols = []
+		for k, v in cm.symbolTable.getAllSymbols().items():
+			if isinstance(v, list):
+				for x in v:
+					if id(x) not in imported:
+						symbols.append((k, x))
+			elif id(v) in imported:
+				continue
+			elif estypesystem.elementaryTypes.get(k, None) is v:
+				continue
+			else:
+				symbols.append((k, v))
+
+		try:
+			saveInterface(self._interfaceDir, cm.filename, hashes, cm.dependencies, symbols)
+		except (IOError, OSError):
+			pass # interface files only speed up compilation
+
+
+	def _loadInterface(self, filename):
+		data = loadInterface(self._interfaceDir, filename)
+		if not data:
+			return None
+
+		# rebuild the module symbol table like ASTTypeAnnotator does
+		st = SymbolTable()
+		for k, v in estypesystem.elementaryTypes.items():
+			st.addSymbol(k, v)
+
+		for x in data['dependencies']:
+			dep, where = self._findModule(x)
+			if not dep:
+				return None
+
+			for name, symbol in getExportedSymbols(dep.symbolTable):
+				if isAlreadyImported(st, name, symbol):
+					continue
+				prevDef = st.findSymbol(name)
+				if prevDef and not (isinstance(prevDef, list) and isinstance(symbol, ESFunction)):
+					return None
+
+				st.addSymbol(name, symbol)
+
+		for name, symbol in data['symbols']:
+			st.addSymbol(name, symbol)
+
+		stamps = {}
+		for fn in data['hashes']:
+			stamps[fn] = getFileStamp(fn)
+
+		cm = CachedModule(filename, st, data['dependencies'], stamps, data['hashes'])
+		self._modules[filename] = cm
+
+		return cm
+
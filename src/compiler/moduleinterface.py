@@ -0,0 +1,166 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# reading and writing of module interface files (.esi)
+#
+# An interface file stores the symbols a module defines itself, so importing modules do not need to parse and annotate
+# the source again. Symbols the module imported are not stored; they are taken from the interface files of the imported
+# modules.
+# Interface files are keyed by the md5 hashes of the source of the module and of all modules imported directly or
+# indirectly. A file is only used when all of them still match.
+
+import os
+import hashlib
+import tempfile
+try:
+	import cPickle as pickle
+except ImportError:
+	import pickle
+
+
+INTERFACE_VERSION = 1 # increment whenever the format or the pickled classes change
+
+
+
+def hashSource(source):
+	return hashlib.md5(source).hexdigest()
+
+
+def hashFile(filename):
+	try:
+		f = file(filename, 'rb')
+		try:
+			data = f.read()
+		finally:
+			f.close()
+	except IOError:
+		return None
+
+	return hashSource(data)
+
+
+def getInterfaceFilename(interfaceDir, filename):
+	''' returns the name of the interface file of the module filename '''
+	assert(os.path.isabs(filename))
+
+	name = os.path.splitext(os.path.basename(filename))[0]
+	return os.path.join(interfaceDir, '%s-%s.esi' % (name, hashlib.md5(filename).hexdigest()))
+
+
+def saveInterface(interfaceDir, filename, hashes, dependencies, symbols):
+	''' writes an interface file
+
+	hashes maps the filenames of the module and all modules imported directly or indirectly to their md5 hashes
+	dependencies is the list of directly imported modules
+	symbols is a list of (name, symbol) tuples defined by the module itself
+	'''
+	data = {}
+	data['version'] = INTERFACE_VERSION
+	data['filename'] = filename
+	data['hashes'] = hashes
+	data['dependencies'] = dependencies
+	data['symbols'] = symbols
+
+	if not os.path.isdir(interfaceDir):
+		try:
+			os.makedirs(interfaceDir)
+		except OSError:
+			# maybe created by another compiler process in the meantime
+			if not os.path.isdir(interfaceDir):
+				raise
+
+	# several compiler processes may write the same file: write to a temporary file and atomically replace the old one
+	fd, tmpFilename = tempfile.mkstemp(suffix='.tmp', dir=interfaceDir)
+	try:
+		f = os.fdopen(fd, 'wb')
+		try:
+			pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+		finally:
+			f.close()
+		os.rename(tmpFilename, getInterfaceFilename(interfaceDir, filename))
+	except:
+		os.remove(tmpFilename)
+		raise
+
+
+def loadInterface(interfaceDir, filename):
+	''' returns the data saved by saveInterface or None, if there is no interface file or it is out of date '''
+	try:
+		f = file(getInterfaceFilename(interfaceDir, filename), 'rb')
+	except IOError:
+		return None
+
+	try:
+		try:
+			data = pickle.load(f)
+		finally:
+			f.close()
+	except Exception:
+		# truncated file or written by an incompatible compiler version; it will get overwritten
+		return None
+
+	if not isinstance(data, dict) or data.get('version', None) != INTERFACE_VERSION or data['filename'] != filename:
+		return None
+
+	for fn, h in data['hashes'].iteritems():
+		if hashFile(fn) != h:
+			return None
+
+	return data
+
+
+def listInterfaces(interfaceDir):
+	''' returns the filenames of all interface files in interfaceDir '''
+	try:
+		names = os.listdir(interfaceDir)
+	except OSError:
+		return []
+
+	return [os.path.join(interfaceDir, x) for x in names if x.endswith('.esi')]
+
+
+def getInterfaceModule(interfaceFilename):
+	''' returns the filename of the module described by an interface file or None, if the file can not be used '''
+	try:
+		f = file(interfaceFilename, 'rb')
+	except IOError:
+		return None
+
+	try:
+		try:
+			data = pickle.load(f)
+		finally:
+			f.close()
+	except Exception:
+		return None
+
+	if not isinstance(data, dict) or data.get('version', None) != INTERFACE_VERSION:
+		return None
+	return data['filename']
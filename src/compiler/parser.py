@@ -31,25 +31,33 @@
 import setuppaths
 
 import antlr3
+import dfacache # must be imported before the generated module
 import exoselfParser
+from treeadaptor import TreeAdaptor
+from sourcelines import getLineTable
 
 
 class Parser(exoselfParser.exoselfParser):
-	def __init__(self, tokens, source=None):
+	def __init__(self, tokens, source=None, errors=None, texts=None):
 		exoselfParser.exoselfParser.__init__(self, tokens)
+		self.setTreeAdaptor(TreeAdaptor(texts)) # build our own tree type directly; texts interns the node texts
 		self._source = source
-		if source:
-			self._sourceLines = source.splitlines()
-		else:
-			self._sourceLines = None
+		self._errors = errors # if a list is given, errors are appended as (line, column, message) instead of printed
+		self._sourceLines = None # line table, looked up on the first error
 	
 	def displayRecognitionError(self, tokenNames, e):
+		if self._errors is not None:
+			self._errors.append((e.line, e.charPositionInLine, self.getErrorMessage(e, tokenNames)))
+			return
+
 		if not e.line:
 			s = 'line ???:???:\n'
 		else:
 			s = 'line %d:%d parse error\n' % (e.line, e.charPositionInLine)
 
 			# print some context
+			if self._source and self._sourceLines is None:
+				self._sourceLines = getLineTable(self._source)
 			if self._sourceLines:
 				before = 3
 				after = 3
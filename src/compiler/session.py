@@ -0,0 +1,393 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# analysis sessions for editors
+#
+# A session keeps the AST and the annotations of one module between edits. The source is split into top level
+# declarations; only declarations whose text changed are lexed and parsed again. When the interface of the module is
+# unchanged (imports, structs, typedefs, aliases, globals and function signatures) and no imported module changed, only
+# the changed function bodies are annotated again and all other functions keep their annotations. Otherwise the whole
+# module is annotated again from unannotated copies of the declarations, which is still much cheaper than parsing.
+
+import os
+import re
+
+from tree import Tree, TreeType
+from errors import CompileError
+from astfile import dumpAST, ASTFile
+from sourcelines import getLineTable
+from modulecache import ModuleCache, getFileStamp
+from typeannotator import ASTTypeAnnotator
+
+
+# keywords starting a top level declaration
+_declarationKeywords = set(['def', 'from', 'struct', 'typedef', 'alias', 'module', 'package'])
+
+# comments, strings and braces; an open multi line comment extends to the end of the line
+_lineTokens = re.compile(r'/\*.*?\*/|(/\*)|(?://|#).*$|\w*"[^"]*"|[{}]')
+_firstWord = re.compile(r'\w*')
+
+
+
+def splitDeclarations(source):
+	''' splits the source into top level declarations; returns a list of (first line, text)
+
+	A declaration starts at the beginning of a line outside of any braces and comments, when the line starts with a
+	declaration keyword or the previous declaration ended with a semicolon or a closing brace. Comments and empty lines
+	belong to the preceding declaration.
+	'''
+	declarations = []
+	start = 0
+	lines = source.split('\n')
+
+	depth = 0
+	inComment = False
+	complete = True # the previous declaration ended
+	for i, line in enumerate(lines):
+		pos = 0
+		if inComment:
+			pos = line.find('*/')
+			if pos < 0:
+				continue
+			pos += 2
+			inComment = False
+		elif depth == 0 and line and not line[0].isspace() and line[0] not in '{}#/':
+			if i > start and (complete or _firstWord.match(line).group() in _declarationKeywords):
+				declarations.append((start + 1, '\n'.join(lines[start:i])))
+				start = i
+
+		end = len(line)
+		for m in _lineTokens.finditer(line, pos):
+			s = m.group()
+			if s == '{':
+				depth += 1
+			elif s == '}':
+				depth = max(depth - 1, 0)
+			elif m.group(1):
+				inComment = True
+				end = m.start()
+			elif s[0] in '/#' and not s.startswith('/*'):
+				end = m.start()
+
+		code = line[pos:end].rstrip()
+		if code:
+			complete = code[-1] in ';}'
+
+	declarations.append((start + 1, '\n'.join(lines[start:])))
+	return declarations
+
+
+def _shiftLines(nodes, delta):
+	todo = list(nodes)
+	while todo:
+		t = todo.pop()
+		if t.line:
+			t.line += delta
+		todo.extend(t.children)
+
+
+def _interfaceKey(t):
+	''' the part of a top level declaration other declarations depend on '''
+	if t.type == TreeType.DEFFUNC and len(t.children) == 5:
+		return u'(def %s)' % u' '.join([x.toStringTree() for x in t.children[:4]])
+	return t.toStringTree()
+
+
+
+class _Declaration(object):
+	''' source text, AST and diagnostics of one top level declaration '''
+	def __init__(self, firstLine, text):
+		self.firstLine = firstLine
+		self.text = text
+
+		from source2ast import sourcecode2AST
+
+		self.errors = [] # positions relative to the declaration
+		try:
+			numErrors, ast = sourcecode2AST(text, errors=self.errors)
+		except Exception, e:
+			# half typed code can produce error recovery trees the desugaring pass does not expect
+			numErrors = 1
+			if not self.errors:
+				self.errors.append((1, 0, 'could not parse declaration: %s: %s' % (e.__class__.__name__, e)))
+
+		# keep an unannotated copy; positions are relative to the declaration
+		self._data = None
+		self.keys = []
+		self.nodes = []
+		if not (numErrors or self.errors):
+			self._data = dumpAST(ast)
+			self.keys = [_interfaceKey(x) for x in ast.children]
+			self.nodes = ast.children
+			_shiftLines(self.nodes, firstLine - 1)
+		self.nodesFirstLine = firstLine # the line the positions of nodes are relative to
+		self.annotated = False
+		self.diagnostics = [] # errors found by the annotator, positions relative to the declaration
+
+
+	def loadNodes(self):
+		''' makes sure nodes are not annotated; annotated nodes are replaced with copies '''
+		if self.annotated:
+			self.nodes = ASTFile(self._data).getTree().children
+			_shiftLines(self.nodes, self.firstLine - 1)
+			self.nodesFirstLine = self.firstLine
+			self.annotated = False
+		else:
+			self.syncLines()
+		self.diagnostics = []
+
+
+	def syncLines(self):
+		if self.nodesFirstLine != self.firstLine:
+			_shiftLines(self.nodes, self.firstLine - self.nodesFirstLine)
+			self.nodesFirstLine = self.firstLine
+
+
+
+class _SessionAnnotator(ASTTypeAnnotator):
+	''' annotator which reports errors of functions without stopping and can annotate single functions again '''
+	def __init__(self, searchPaths, moduleCache, onError):
+		ASTTypeAnnotator.__init__(self, searchPaths, moduleCache)
+		self._onError = onError
+
+
+	def _onDefFunction(self, ast, *args, **kwargs):
+		try:
+			ASTTypeAnnotator._onDefFunction(self, ast, *args, **kwargs)
+		except CompileError, e:
+			self._onError(ast, e)
+
+
+	def annotateFunction(self, ast, sourcecode):
+		''' annotates the body of a function of the already annotated module; its signature must be annotated '''
+		self._sourcecode = sourcecode
+		self._sourcecodeLines = getLineTable(sourcecode)
+
+		self._nodes = [self._moduleNode]
+		try:
+			self._dispatch(ast)
+		finally:
+			self._nodes = []
+
+
+
+class AnalysisSession(object):
+	''' keeps the analysis of one module between edits; call update with the new source after every edit '''
+	def __init__(self, filename, searchPaths, moduleCache=None):
+		assert(os.path.isabs(filename))
+
+		self.filename = filename
+		self._searchPaths = searchPaths
+		if moduleCache is None:
+			moduleCache = ModuleCache()
+		self._moduleCache = moduleCache
+
+		self._declarations = []
+		self._annotator = None # annotator of the last complete annotation; None if there is none
+		self._moduleNode = None
+		self._keys = None
+		self._stamps = None # file stamps of the imported modules
+		self._moduleErrors = []
+
+		self.stats = {'parsed': 0, 'reused': 0, 'annotated': 0, 'fullAnnotations': 0}
+
+
+	def update(self, source):
+		''' analyzes the new source of the module; returns the diagnostics as sorted list of (line, column, message) '''
+		self._source = source
+
+		# reuse declarations with unchanged text
+		old = {}
+		for d in self._declarations:
+			old.setdefault(d.text, []).append(d)
+
+		declarations = []
+		changed = []
+		for firstLine, text in splitDeclarations(source):
+			l = old.get(text, None)
+			if l:
+				d = l.pop(0)
+				d.firstLine = firstLine
+				self.stats['reused'] += 1
+			else:
+				d = _Declaration(firstLine, text)
+				changed.append(d)
+				self.stats['parsed'] += 1
+			declarations.append(d)
+		self._declarations = declarations
+
+		if any(x.errors for x in declarations):
+			# like the compiler the module is not annotated with syntax errors
+			self._annotator = None
+			return self.getDiagnostics()
+
+		keys = []
+		for d in declarations:
+			keys.extend(d.keys)
+
+		if self._annotator and keys == self._keys and self._importsUnchanged() and self._onlyFunctionsChanged(changed, old):
+			self._annotateFunctions(changed, old)
+		else:
+			self._annotateModule()
+			self._keys = keys
+
+		return self.getDiagnostics()
+
+
+	def getDiagnostics(self):
+		diagnostics = list(self._moduleErrors)
+		for d in self._declarations:
+			for line, column, message in d.errors + d.diagnostics:
+				diagnostics.append((line + d.firstLine - 1, column, message))
+		diagnostics.sort()
+		return diagnostics
+
+
+	def getAST(self):
+		''' returns the module node of the last annotation or None, if the module could not be annotated '''
+		if not self._annotator:
+			return None
+
+		for d in self._declarations:
+			d.syncLines()
+		return self._moduleNode
+
+
+	def _importsUnchanged(self):
+		for fn, stamp in self._stamps.iteritems():
+			if getFileStamp(fn) != stamp:
+				return False
+		return True
+
+
+	def _onlyFunctionsChanged(self, changed, old):
+		# every changed function needs the annotated signature of its previous version
+		self._previousFunctions = {}
+		for l in old.itervalues():
+			for d in l:
+				for key, t in zip(d.keys, d.nodes):
+					self._previousFunctions[key] = t
+
+		for d in changed:
+			for key, t in zip(d.keys, d.nodes):
+				if t.type != TreeType.DEFFUNC or len(t.children) != 5 or key not in self._previousFunctions:
+					return False
+		return True
+
+
+	def _annotateFunctions(self, changed, old):
+		self._moduleNode.children = []
+		for d in self._declarations:
+			self._moduleNode.children.extend(d.nodes)
+
+		for d in changed:
+			for key, t in zip(d.keys, d.nodes):
+				previous = self._previousFunctions[key]
+
+				# the signature did not change: take over its annotations
+				t.esFunction = previous.esFunction
+				t.esType = previous.esType
+				for i in range(4):
+					_copyAnnotations(previous.children[i], t.children[i])
+
+				d.annotated = True
+				self._currentDeclaration = d
+				self._annotator.annotateFunction(t, self._source)
+				self.stats['annotated'] += 1
+		self._previousFunctions = None
+
+
+	def _annotateModule(self):
+		self.stats['fullAnnotations'] += 1
+
+		self._moduleErrors = []
+		root = Tree(TreeType.MODULESTART, u'MODULESTART')
+		owners = {}
+		for d in self._declarations:
+			d.loadNodes()
+			d.annotated = True
+			root.children.extend(d.nodes)
+			for t in d.nodes:
+				owners[id(t)] = d
+
+		def onError(ast, e):
+			d = owners.get(id(ast), None)
+			if d is None:
+				self._moduleErrors.append(_diagnostic(e))
+			else:
+				line, column, message = _diagnostic(e)
+				d.diagnostics.append((line - d.firstLine + 1, column, message))
+
+		annotator = _SessionAnnotator(self._searchPaths, self._moduleCache, onError)
+		try:
+			annotator.walkAST(root, self.filename, self._source)
+		except CompileError, e:
+			self._moduleErrors.append(_diagnostic(e))
+			self._annotator = None
+			return
+
+		self._annotator = annotator
+		self._moduleNode = root
+		self.stats['annotated'] += len([x for x in root.children if x.type == TreeType.DEFFUNC])
+
+		self._stamps = {}
+		for x in root.dependencies:
+			cm = self._moduleCache.findModule(x)
+			if cm:
+				self._stamps.update(cm.stamps)
+			else:
+				self._stamps[x] = getFileStamp(x)
+
+		# errors of functions annotated again later belong to their new declaration
+		def onFunctionError(ast, e):
+			d = self._currentDeclaration
+			line, column, message = _diagnostic(e)
+			d.diagnostics.append((line - d.firstLine + 1, column, message))
+		annotator._onError = onFunctionError
+
+
+
+def _diagnostic(e):
+	line = getattr(e, 'line', None) or 1
+	message = getattr(e, 'shortMessage', None) or e.message.strip().split('\n')[0]
+	return (line, getattr(e, 'charPos', 0), message)
+
+
+def _copyAnnotations(src, dst):
+	''' copies the attributes added by the annotator from the tree src to the identically shaped tree dst '''
+	todo = [(src, dst)]
+	while todo:
+		s, d = todo.pop()
+		for k, v in s.iterAttributes():
+			if k == 'dispatchArgs':
+				continue # refers to the children of src
+			if not hasattr(d, k):
+				setattr(d, k, v)
+		todo.extend(zip(s.children, d.children))
@@ -31,41 +31,45 @@
 import setuppaths
 
 import antlr3
+from charstream import ByteCharStream
 from lexer import Lexer
 from parser import Parser
-from tree import Tree, TreeType
+from tree import TreeType
 from desugar import desugar
+from timereport import getTimer
 
 
-def antlrTree2Tree(antlrTree):
-	t = Tree(antlrTree.type, antlrTree.text, antlrTree.line, antlrTree.charPositionInLine)
+def sourcecode2AST(source, type='module', errors=None):
+	''' returns (number of syntax errors, AST)
 
-	for i in range(antlrTree.getChildCount()):
-		subT = antlrTree2Tree(antlrTree.getChild(i))
-		t.addChild(subT)
+	If errors is a list, syntax errors are appended to it as (line, column, message) instead of being printed.
+	'''
+	timer = getTimer()
 
-	return t
-
-
-def sourcecode2AST(source, type='module'):
-	# append additional NEWLINE at end of file
-	source += '\n'
-
-	inputStream = antlr3.ANTLRStringStream(source)
-	lexer = Lexer(inputStream, source)
+	timer.start('lex')
+	inputStream = ByteCharStream(source) # appends a NEWLINE at the end of the file
+	lexer = Lexer(inputStream, source, errors)
 	tokens = antlr3.CommonTokenStream(lexer)
 	#tokens.discardOffChannelTokens = True
-	parser = Parser(tokens, source)
+	if timer.isActive():
+		# the parser would request the tokens on demand, which would hide the time needed by the lexer
+		tokens.fillBuffer()
+	timer.stop()
+
+	timer.start('parse')
+	parser = Parser(tokens, source, errors, {}) # node texts are only interned within this parse
 
 	assert type in ['module']
 	if type == 'module':
 		result = parser.start_module()
+	timer.stop()
 
-	# copy ast to our own tree implementation to make modifying easier
-	astTree = antlrTree2Tree(result.tree)
+	astTree = result.tree
 
 	# 'desugar' it inplace
+	timer.start('desugar')
 	desugar(astTree)
+	timer.stop()
 
 	return (parser.getNumberOfSyntaxErrors(), astTree)
 
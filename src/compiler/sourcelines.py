@@ -0,0 +1,104 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# line tables for source files
+#
+# Error messages, assert messages and debug tools show source lines around a node. Instead of splitting the source
+# into a list of line strings in every AST walker, all users of a source string share one table of line offsets,
+# which is built on first use. Lines are sliced from the source when they are needed.
+
+from array import array
+import re
+import weakref
+
+
+_lineBreak = re.compile(r'\r\n|\r|\n')
+
+
+class LineTable(object):
+	''' the lines of a source string; behaves like the list returned by source.splitlines() '''
+	def __init__(self, source):
+		self._source = source
+		self._starts = None
+
+
+	def _build(self):
+		starts = array('L', [0])
+		for m in _lineBreak.finditer(self._source):
+			starts.append(m.end())
+		if starts[-1] == len(self._source):
+			starts.pop() # no line after the last line break
+		self._starts = starts
+
+
+	def __len__(self):
+		if self._starts is None:
+			self._build()
+		return len(self._starts)
+
+
+	def __getitem__(self, i):
+		if self._starts is None:
+			self._build()
+
+		starts = self._starts
+		start = starts[i]
+		if i < 0:
+			i += len(starts)
+		if i + 1 < len(starts):
+			end = starts[i + 1]
+		else:
+			end = len(self._source)
+
+		s = self._source
+		if end > start and s[end - 1] == '\n':
+			end -= 1
+		if end > start and s[end - 1] == '\r':
+			end -= 1
+		return s[start:end]
+
+
+	def getLine(self, lineBase1):
+		''' returns the line with the given 1 based number or None '''
+		if 1 <= lineBase1 <= len(self):
+			return self[lineBase1 - 1]
+		return None
+
+
+
+_tables = weakref.WeakValueDictionary()
+
+def getLineTable(source):
+	''' returns the line table of source; the table is shared as long as anyone uses it '''
+	table = _tables.get(source)
+	if table is None:
+		table = LineTable(source)
+		_tables[source] = table
+	return table
@@ -28,6 +28,8 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # 
 
+import sys
+
 from errors import CompileError, RecoverableCompileError
 from estype import ESType
 from esvariable import ESVariable
@@ -59,6 +61,26 @@ class SymbolTable(object):
 
 			self._symbols[name] = symbol
 
+	def copy(self):
+		''' returns a new symbol table with the same symbols; the symbols themselves are shared '''
+		st = SymbolTable()
+		for k, v in self._symbols.iteritems():
+			if isinstance(v, list):
+				v = list(v) # overloads added to the copy must not show up here
+			st._symbols[k] = v
+		st._aliases = self._aliases.copy()
+		return st
+
+
+	def getSize(self):
+		''' returns the bytes used by the table, its dicts and overload lists; the symbols themselves are not included '''
+		size = sys.getsizeof(self) + sys.getsizeof(self._symbols) + sys.getsizeof(self._aliases)
+		for v in self._symbols.itervalues():
+			if isinstance(v, list):
+				size += sys.getsizeof(v)
+		return size
+
+
 	def getAllSymbols(self):
 		return self._symbols.copy() # shallow copy should be enough
 
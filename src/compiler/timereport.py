@@ -0,0 +1,257 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# timing of compiler phases
+#
+# The compiler reports the start and end of its phases to the timer returned by getTimer. By default this is a
+# NullTimer, which does nothing. The driver installs a PhaseTimer for --time-report and --trace-file.
+
+import os
+import gc
+import time
+import json
+import fcntl
+from contextlib import contextmanager
+
+from memreport import getPeakMemory
+
+
+
+class NullTimer(object):
+	''' does not record anything; used when no report was requested '''
+
+	def start(self, name, detail=None, countObjects=True):
+		pass
+
+
+	def stop(self):
+		pass
+
+
+	@contextmanager
+	def phase(self, name, detail=None, countObjects=True):
+		yield
+
+
+	def isActive(self):
+		return False
+
+
+	def getEvents(self):
+		return []
+
+
+	def addEvents(self, events):
+		pass
+
+
+
+class PhaseTimer(NullTimer):
+	''' records the wall time of nested phases
+
+	For phases with countObjects=True also the change of the number of objects tracked by the garbage collector is
+	recorded. Counting needs time proportional to the number of objects, so fine grained phases like single functions
+	or optimization passes should not count objects.
+	With recordMemory=True the peak memory usage of the process at the end of each phase and its increase during the
+	phase are recorded, too.
+	'''
+
+	def __init__(self, recordMemory=False):
+		self._recordMemory = recordMemory
+		self._events = [] # list of (path, detail, start, duration, objects, pid, memory); path is a tuple of the names of all enclosing phases and this phase
+		self._stack = [] # list of (name, detail, start, objects, peak memory) of the currently running phases
+
+
+	def start(self, name, detail=None, countObjects=True):
+		if countObjects:
+			objects = len(gc.get_objects())
+		else:
+			objects = None
+
+		if self._recordMemory:
+			peak = getPeakMemory()
+		else:
+			peak = None
+
+		self._stack.append((name, detail, time.time(), objects, peak))
+
+
+	def stop(self):
+		t = time.time()
+		name, detail, start, objects, peak = self._stack.pop()
+		if objects is not None:
+			objects = len(gc.get_objects()) - objects
+
+		# (peak at the end of the phase, increase of the peak during the phase)
+		memory = None
+		if peak is not None:
+			newPeak = getPeakMemory()
+			memory = (newPeak, newPeak - peak)
+
+		path = tuple([x[0] for x in self._stack]) + (name,)
+		self._events.append((path, detail, start, t - start, objects, os.getpid(), memory))
+
+
+	@contextmanager
+	def phase(self, name, detail=None, countObjects=True):
+		self.start(name, detail, countObjects)
+		try:
+			yield
+		finally:
+			self.stop()
+
+
+	def isActive(self):
+		return True
+
+
+	def getEvents(self):
+		''' returns all recorded phases; can be passed to addEvents of another timer, for example to merge results of worker processes '''
+		return list(self._events)
+
+
+	def addEvents(self, events):
+		self._events.extend(events)
+
+
+	def formatReport(self):
+		''' returns a text table; phases with the same name and the same enclosing phases are combined '''
+		totals = {} # maps path to [calls, time, objects, peak memory, increase of peak memory]
+		order = []
+		for path, detail, start, duration, objects, pid, memory in sorted(self._events, key=lambda x: x[2]):
+			if path not in totals:
+				totals[path] = [0, 0.0, None, None, None]
+				order.append(path)
+
+			x = totals[path]
+			x[0] += 1
+			x[1] += duration
+			if objects is not None:
+				x[2] = (x[2] or 0) + objects
+			if memory is not None:
+				x[3] = max(x[3], memory[0])
+				x[4] = (x[4] or 0) + memory[1]
+
+		# children directly after their parents
+		firstSeen = {}
+		for i, path in enumerate(order):
+			firstSeen[path] = i
+		def sortKey(path):
+			return [firstSeen[path[:i + 1]] for i in range(len(path)) if path[:i + 1] in firstSeen]
+		order.sort(key=sortKey)
+
+		s = []
+		if self._recordMemory:
+			s.append('peak: cumulative peak memory of the process (ru_maxrss) at the end of the phase; it never decreases')
+			s.append('peak +: increase of the cumulative peak during the phase')
+			s.append('')
+		header = '%-48s %8s %12s %12s' % ('phase', 'calls', 'time [ms]', 'objects')
+		if self._recordMemory:
+			header += ' %12s %12s' % ('peak [MB]', 'peak + [MB]')
+		s.append(header)
+		for path in order:
+			calls, duration, objects, peak, peakIncrease = totals[path]
+			if objects is None:
+				objects = ''
+			else:
+				objects = '%+d' % objects
+
+			name = '  ' * (len(path) - 1) + path[-1]
+			line = '%-48s %8d %12.1f %12s' % (name, calls, duration * 1000, objects)
+			if peak is not None:
+				line += ' %12.1f %12.1f' % (peak / 1048576.0, peakIncrease / 1048576.0)
+			s.append(line)
+
+		return '\n'.join(s)
+
+
+	def writeTrace(self, filename, processName):
+		''' appends all recorded phases to a trace file in the Chrome trace event format (JSON array format)
+
+		The closing bracket of the array is optional in this format, so it is never written. This way any number of
+		compiler processes can append their events to the same file, for example during a build.
+		'''
+		events = []
+		pids = set()
+		for path, detail, start, duration, objects, pid, memory in self._events:
+			if pid not in pids:
+				pids.add(pid)
+				name = processName
+				if pid != os.getpid():
+					name += ' (worker)'
+				events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': name}})
+
+			e = {'name': path[-1], 'cat': path[0], 'ph': 'X', 'pid': pid, 'tid': 0, 'ts': int(start * 1000000), 'dur': int(duration * 1000000)}
+			args = {}
+			if detail is not None:
+				e['name'] = '%s %s' % (path[-1], detail)
+				args['detail'] = detail
+			if objects is not None:
+				args['objects'] = objects
+			if memory is not None:
+				args['peakMemory'] = memory[0]
+				args['peakMemoryIncrease'] = memory[1]
+			if args:
+				e['args'] = args
+			events.append(e)
+
+		s = []
+		for e in events:
+			s.append(json.dumps(e))
+			s.append(',\n')
+		s = ''.join(s)
+
+		f = file(filename, 'a')
+		try:
+			# one write per process while holding the lock, so events of concurrent processes are not interleaved
+			fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+			f.seek(0, os.SEEK_END)
+			if f.tell() == 0:
+				f.write('[\n')
+			f.write(s)
+		finally:
+			f.close()
+
+
+
+_timer = NullTimer()
+
+def getTimer():
+	return _timer
+
+
+def setTimer(timer):
+	''' installs timer for all phases of the compiler; returns the previous timer '''
+	global _timer
+
+	previous = _timer
+	_timer = timer
+	return previous
+
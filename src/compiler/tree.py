@@ -29,7 +29,6 @@
 # 
 
 # store token types in a class
-import copy
 
 
 class TreeType(object):
@@ -37,54 +36,152 @@ class TreeType(object):
 
 def _insertTokenIDs():
 	import setuppaths
-	import exoselfParser
 
-	for x in exoselfParser.tokenNames:
-		if x[0] == '<':
-			continue
+	try:
+		# generated together with the parser by the Makefile; much faster to import than the parser
+		from exoselfTokens import tokenIDs
+	except ImportError:
+		import dfacache
+		import exoselfParser
 
-		id = eval('exoselfParser.%s' % x)
-		s = 'TreeType.%s = %d' % (x, id)
+		tokenIDs = {}
+		for x in exoselfParser.tokenNames:
+			if x[0] == '<':
+				continue
 
-		exec s
+			tokenIDs[x] = getattr(exoselfParser, x)
+
+	for name, id in tokenIDs.iteritems():
+		setattr(TreeType, name, id)
 _insertTokenIDs()
 
 
 
+def _share(x):
+	return x
+
+
+def _copySymbolTable(st):
+	if st is None:
+		return None
+	return st.copy()
+
+
+# how attributes are copied by Tree.copy; None means the attribute is not copied at all
+attributeCopy = {
+	'symbolTable': _copySymbolTable, # the copy may get its own symbols
+	'dependencies': list,
+	'moduleCTors': list,
+	'moduleDTors': list,
+
+	# llvm values belong to the code generated for the original node
+	'llvmValue': None,
+	'llvmRef': None,
+	'dbgSubProg': None,
+	'breakTarget': None,
+	'continueTarget': None,
+
+	# the cached handler arguments of the AST walker refer to the children of the original node
+	'dispatchArgs': None,
+	}
+
+
+
+# a node position is packed into one int: the line above and the column in the lowest _columnBits bits
+_columnBits = 20
+_columnMask = (1 << _columnBits) - 1
+
+def packPosition(line, charPos):
+	return (line << _columnBits) | max(0, min(charPos, _columnMask)) # antlr uses -1 for imaginary tokens
+
+
+
 class Tree(object):
-	''' internal tree type used for AST storage instead of the antlr tree type '''
+	''' internal tree type used for AST storage instead of the antlr tree type
+
+	Nodes have a fixed set of slots: the token, the children, the packed position (see line and charPos) and the
+	annotations added by the type annotator and the code generator. Like missing attributes, annotations which were not set raise AttributeError.
+	Some node types need additional annotations and are instances of subclasses, see nodeClasses;
+	Tree(type, text, ...) creates an instance of the class matching type.
+	'''
+	__slots__ = ['type', 'text', 'children', 'pos',
+			'esType', 'esFunction', 'symbolTable', # type annotator
+			'llvmValue', 'llvmRef'] # code generator
+
+	def __new__(cls, type=None, *args, **kwargs):
+		if cls is Tree:
+			cls = nodeClasses.get(type, Tree)
+		return object.__new__(cls)
+
+
 	def __init__(self, type, text, line=0, charPos=0):
 		assert(isinstance(type, int))
-		if not isinstance(text, unicode):
-			text = unicode(text)# TODO not really optimal...
 		self.type = type
+		if not isinstance(text, unicode):
+			text = unicode(text)
 		self.text = text
 		self.children = []
-		self.line = line
-		self.charPos = charPos
+		self.pos = packPosition(line, charPos)
+
+
+	def getLine(self):
+		return self.pos >> _columnBits
+
+	def setLine(self, line):
+		self.pos = packPosition(line, self.pos & _columnMask)
+
+	line = property(getLine, setLine)
+
 
-	def setText(self, text):
-		assert(isinstance(text, unicode))
-		self._text = text
+	def getCharPos(self):
+		return self.pos & _columnMask
 
-	def getText(self):
-		return self._text
+	def setCharPos(self, charPos):
+		self.pos = packPosition(self.pos >> _columnBits, charPos)
 
-	text = property(getText, setText)
+	charPos = property(getCharPos, setCharPos)
+
+
+	def iterAttributes(self):
+		''' yields (name, value) for every slot which was set, including the children '''
+		for k in self.slotNames:
+			try:
+				yield k, getattr(self, k)
+			except AttributeError:
+				pass
 
 
 	def copy(self, copyChildren):
-		# we must also copy additional attributes!
+		''' returns a copy of this node; the copy gets copies of all children or no children at all
 
+		Annotations are copied as declared in attributeCopy; all other slots are immutable or interned, like esType,
+		and are shared with the copy.
+		'''
+		root = self._copyNode()
 		if copyChildren:
-			return copy.deepcopy(self)
-		else:
-			# we must also use deepcopy even when no children should be copied - there may be unknown attributes added to this instance which should not be copied in a shallow way
-			saveChildren = self.children
-			self.children = []
-			t = copy.deepcopy(self)
-			self.children = saveChildren
-			return t
+			todo = [(self, root)]
+			while todo:
+				src, dst = todo.pop()
+				for x in src.children:
+					c = x._copyNode()
+					dst.children.append(c)
+					todo.append((x, c))
+		return root
+
+
+	def _copyNode(self):
+		t = object.__new__(self.__class__)
+		for k, copyFunction in self._copySlots:
+			try:
+				v = getattr(self, k)
+			except AttributeError:
+				continue
+			if copyFunction is _share:
+				setattr(t, k, v)
+			elif copyFunction is not None:
+				setattr(t, k, copyFunction(v))
+		t.children = []
+		return t
 
 
 	def getChildCount(self):
@@ -114,7 +211,43 @@ class Tree(object):
 
 
 
+class ModuleTree(Tree):
+	''' MODULESTART '''
+	__slots__ = ['moduleName', 'packageName', 'dependencies', 'moduleCTors', 'moduleDTors']
+
+
+class FunctionTree(Tree):
+	''' DEFFUNC '''
+	__slots__ = ['dbgSubProg', 'dispatchArgs']
+
+
+class LoopTree(Tree):
+	''' FOR and WHILE; the nodes created when desugaring WHILE nodes are LoopTrees, too '''
+	__slots__ = ['breakTarget', 'continueTarget']
+
+
+class IntegerConstantTree(Tree):
+	''' INTEGER_CONSTANT '''
+	__slots__ = ['signed', 'bits', 'minBits', 'dispatchArgs']
 
 
+# maps node types to the classes of their nodes; Tree is used for all other types
+nodeClasses = {
+	TreeType.MODULESTART: ModuleTree,
+	TreeType.DEFFUNC: FunctionTree,
+	TreeType.FOR: LoopTree,
+	TreeType.WHILE: LoopTree,
+	TreeType.INTEGER_CONSTANT: IntegerConstantTree,
+	}
 
 
+def _initSlots():
+	# slotNames: all slots of a node class, including the inherited ones
+	# _copySlots: (name, copy function) pairs used by Tree._copyNode
+	for cls in [Tree, ModuleTree, FunctionTree, LoopTree, IntegerConstantTree]:
+		slots = []
+		for x in reversed(cls.__mro__):
+			slots.extend(x.__dict__.get('__slots__', []))
+		cls.slotNames = slots
+		cls._copySlots = [(k, attributeCopy.get(k, _share)) for k in slots if k != 'children']
+_initSlots()
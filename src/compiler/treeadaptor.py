@@ -0,0 +1,239 @@
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# builds the AST of the compiler directly while parsing
+#
+# By default the parser builds antlr3.tree.CommonTree nodes, which hold a copy of their token. This adaptor creates
+# tree.Tree nodes instead, so the AST does not have to be copied after parsing.
+
+import setuppaths
+
+import antlr3
+from antlr3.tree import BaseTreeAdaptor
+from tree import Tree, nodeClasses
+
+
+class _NilTree(object):
+	''' list of trees returned by rules without a root node; never part of the final AST '''
+	def __init__(self):
+		self.children = []
+
+
+
+class TreeAdaptor(BaseTreeAdaptor):
+	''' tree adaptor creating tree.Tree nodes
+
+	Imaginary tokens like MODULESTART have no position in the source. Like CommonTree the node takes the position
+	of its first child instead.
+
+	Node texts are interned in the dict texts; most of them, like names, operators and the texts of imaginary tokens,
+	repeat a lot. The dict should only live as long as the parse, so long running processes do not keep the texts
+	of all parsed sources.
+	'''
+	def __init__(self, texts=None):
+		BaseTreeAdaptor.__init__(self)
+		if texts is None:
+			texts = {}
+		self._texts = texts
+
+
+	def _intern(self, text):
+		if not isinstance(text, unicode):
+			text = unicode(text)
+		return self._texts.setdefault(text, text)
+
+
+	def nil(self):
+		return _NilTree()
+
+
+	def isNil(self, t):
+		return t.__class__ is _NilTree
+
+
+	def createWithPayload(self, payload):
+		if payload is None:
+			return _NilTree()
+		return Tree(payload.type, self._intern(payload.text), payload.line, max(payload.charPositionInLine, 0))
+
+
+	def createFromToken(self, tokenType, fromToken, text=None):
+		if text is None:
+			text = fromToken.text
+		return Tree(tokenType, self._intern(text), fromToken.line, max(fromToken.charPositionInLine, 0))
+
+
+	def createFromType(self, tokenType, text):
+		return Tree(tokenType, self._intern(text))
+
+
+	def createToken(self, fromToken=None, tokenType=None, text=None):
+		if fromToken is not None:
+			return antlr3.CommonToken(oldToken=fromToken)
+		return antlr3.CommonToken(type=tokenType, text=text)
+
+
+	def errorNode(self, input, start, stop, exc):
+		# the compiler stops after syntax errors, so the node only needs a position for debugging
+		if start is None:
+			return Tree(antlr3.INVALID_TOKEN_TYPE, u'<error>')
+		return Tree(antlr3.INVALID_TOKEN_TYPE, u'<error>', start.line, max(start.charPositionInLine, 0))
+
+
+	def dupNode(self, t):
+		if t is None:
+			return None
+		if t.__class__ is _NilTree:
+			return _NilTree()
+		return Tree(t.type, t.text, t.line, t.charPos)
+
+
+	def dupTree(self, t, parent=None):
+		if t is None:
+			return None
+
+		root = self.dupNode(t)
+		todo = [(t, root)]
+		while todo:
+			src, dst = todo.pop()
+			for x in src.children:
+				c = self.dupNode(x)
+				dst.children.append(c)
+				todo.append((x, c))
+		return root
+
+
+	def addChild(self, t, child):
+		if t is None or child is None:
+			return
+
+		if child.__class__ is _NilTree:
+			children = child.children
+		else:
+			children = [child]
+		if not children:
+			return
+
+		# imaginary tokens take the position of their first child
+		if not t.children and t.__class__ is not _NilTree and t.line == 0:
+			t.pos = children[0].pos
+
+		t.children.extend(children)
+
+
+	def becomeRoot(self, newRoot, oldRoot):
+		if isinstance(newRoot, antlr3.Token):
+			newRoot = self.createWithPayload(newRoot)
+
+		if oldRoot is None:
+			return newRoot
+
+		# ^(nil r) is used like r
+		if newRoot.__class__ is _NilTree:
+			n = len(newRoot.children)
+			if n == 1:
+				newRoot = newRoot.children[0]
+			elif n > 1:
+				raise RuntimeError('more than one node as root')
+
+		self.addChild(newRoot, oldRoot)
+		return newRoot
+
+
+	def rulePostProcessing(self, root):
+		if root is not None and root.__class__ is _NilTree:
+			n = len(root.children)
+			if n == 0:
+				return None
+			elif n == 1:
+				return root.children[0]
+		return root
+
+
+	# the AST does not store token indices, parents or child indices
+
+	def setTokenBoundaries(self, t, startToken, stopToken):
+		pass
+
+	def getTokenStartIndex(self, t):
+		return -1
+
+	def getTokenStopIndex(self, t):
+		return -1
+
+	def getToken(self, t):
+		return None
+
+	def getParent(self, t):
+		return None
+
+	def setParent(self, t, parent):
+		pass
+
+	def getChildIndex(self, t):
+		return 0
+
+	def setChildIndex(self, t, index):
+		pass
+
+
+	def getType(self, t):
+		if t is None:
+			return antlr3.INVALID_TOKEN_TYPE
+		return t.type
+
+	def setType(self, t, type):
+		# the node class depends on the type, see tree.nodeClasses
+		assert(nodeClasses.get(type, Tree) is t.__class__)
+		t.type = type
+
+	def getText(self, t):
+		if t is None:
+			return None
+		return t.text
+
+	def setText(self, t, text):
+		t.text = unicode(text)
+
+	def getChild(self, t, i):
+		if t is None:
+			return None
+		return t.children[i]
+
+	def setChild(self, t, i, child):
+		t.children[i] = child
+
+	def deleteChild(self, t, i):
+		return t.children.pop(i)
+
+	def getChildCount(self, t):
+		if t is None:
+			return 0
+		return len(t.children)
@@ -38,18 +38,26 @@ from esvariable import ESVariable
 import estypesystem
 from symboltable import SymbolTable
 from tree import Tree, TreeType
+from depscan import resolveModule
+from modulecache import ModuleCache, getExportedSymbols, isAlreadyImported
+from timereport import getTimer
 import re
 
 
 class ASTTypeAnnotator(astwalker.ASTWalker):
 	_modulesProcessing = [] # list of absolute paths of modules which are currently processed by ASTTypeAnnotator
-	# TODO add a list / dict of processed modules with their dependencies
 
-	def __init__(self, searchPaths):
+	def __init__(self, searchPaths, moduleCache=None):
 		astwalker.ASTWalker.__init__(self)
 
 		self._searchPaths = searchPaths
 
+		# imported modules are annotated only once and shared by all modules importing them
+		# pass a cache to share them with other compilation units
+		if moduleCache is None:
+			moduleCache = ModuleCache()
+		self._moduleCache = moduleCache
+
 
 	# TODO add to alle functions a comment which attributes are added
 	def walkAST(self, ast, filename, sourcecode=''):
@@ -116,7 +124,9 @@ class ASTTypeAnnotator(astwalker.ASTWalker):
 			if bad:
 				self._raiseException(RecoverableCompileError, tree=exprNode, inlineText='no implicit cast to %s available' % toTypeName)
 
-		newExprNode = exprNode.copy(True)
+		# exprNode becomes the cast node, so everything it contains moves to a new node
+		newExprNode = exprNode.copy(False)
+		newExprNode.children = exprNode.children
 		typeNameNode = exprNode.copy(False)
 
 		typeNameNode.type = TreeType.NAME # FIXME this should be later a typename node
@@ -209,30 +219,7 @@ class ASTTypeAnnotator(astwalker.ASTWalker):
 		assert(os.path.isabs(self._filename))
 
 		# get path to other module
-		modPath = moduleName.text
-		if modPath.startswith('.'):
-			modPath = modPath.split('.')
-			if modPath[0] == '':
-				modPath.pop(0)
-
-			path, ignored = os.path.split(self._filename)
-			for i in range(len(modPath)):
-				if modPath[i] != '':
-					break
-
-				path, ignored = os.path.split(path)
-			toImport = os.path.join(path, *modPath[i:]) + '.es'
-		else:
-			# TODO implement support for importing 'directories' --> if target path is a directory import the file named '__init.es' or something like that instead
-			toImport = ''
-			for sp in self._searchPaths:
-				p = os.path.join(sp, *modPath.split('.')) + '.es'
-				if os.path.exists(p):
-					if os.path.isfile(p):
-						toImport = p
-						break
-
-		toImport = os.path.abspath(toImport)
+		toImport = resolveModule(moduleName.text, self._filename, self._searchPaths)
 
 		if not (os.path.exists(toImport) and os.path.isfile(toImport)):
 			s1 = 'can not find module'
@@ -247,6 +234,33 @@ class ASTTypeAnnotator(astwalker.ASTWalker):
 		# add filename to dependency list
 		self._moduleNode.dependencies.append(toImport)
 
+		st = self._loadModuleSymbolTable(toImport, moduleName)
+
+
+		# many strange things can happen here
+		# assume a user has two modules with the same package names, same module names
+		# and then defines in both modules a function
+		#     def f() as int32;
+		# but with different bodies. Now both function get the same mangled name and we have no idea which one to use...
+		# At least this case will generate a linker error
+
+		# get global symbols
+		for k, v in getExportedSymbols(st):
+			# with diamond shaped imports the same symbol arrives through several modules
+			if isAlreadyImported(self._moduleNode.symbolTable, k, v):
+				continue
+
+			self._addSymbol(name=k, symbol=v)
+
+
+
+
+	def _loadModuleSymbolTable(self, toImport, moduleName):
+		# modules imported by other modules or compilation units of this compiler run were already annotated
+		# or may be available as interface files
+		cm = self._moduleCache.findModule(toImport)
+		if cm:
+			return cm.symbolTable
 
 		# load data
 		f = file(toImport, 'rt')
@@ -265,40 +279,27 @@ class ASTTypeAnnotator(astwalker.ASTWalker):
 		#     ideally first a dependency graph is generated
 		#     this can be used by any make like tool to instruct the compiler to generate (precompiled???) headers
 		#     the headers can be parsed much faster
-		#     additionally we should maintain an internal list of already parsed modules
 		from source2ast import sourcecode2AST
 
-		numErrors, ast = sourcecode2AST(toImportData)
-		if numErrors:
-			self._raiseException(CompileError, tree=moduleName, inlineText='module contains errors')
-
-		mt = ASTTypeAnnotator(searchPaths=self._searchPaths)
-		mt.walkAST(ast, toImport, toImportData)
-
-
-		# many strange things can happen here
-		# assume a user has two modules with the same package names, same module names
-		# and then defines in both modules a function
-		#     def f() as int32;
-		# but with different bodies. Now both function get the same mangled name and we have no idea which one to use...
-		# At least this case will generate a linker error
-
-		# get global symbols
-		st = mt._moduleNode.symbolTable
-		symbols = st.getAllSymbols()
-
-		for k, v in symbols.items():
-			if isinstance(v, list):
-				# ESFunction's
-				for x in v:
-					assert(isinstance(x, ESFunction))
-					self._addSymbol(name=k, symbol=x)
-			elif isinstance(v, ESVariable):
-				# ESVariable's
-				self._addSymbol(name=k, symbol=v)
-			# TODO add ESType's
+		timer = getTimer()
+		timer.start('import', toImport)
+		try:
+			numErrors, ast = sourcecode2AST(toImportData)
+			if numErrors:
+				self._raiseException(CompileError, tree=moduleName, inlineText='module contains errors')
+
+			timer.start('annotate')
+			try:
+				mt = ASTTypeAnnotator(searchPaths=self._searchPaths, moduleCache=self._moduleCache)
+				mt.walkAST(ast, toImport, toImportData)
+			finally:
+				timer.stop()
+		finally:
+			timer.stop()
 
+		self._moduleCache.addModule(toImport, ast, toImportData)
 
+		return ast.symbolTable
 
 
 	def _onFuncPrototype(self, ast, modifierKeys, modifierValues, name, returnTypeName, parameterNames, parameterTypeNames, block):
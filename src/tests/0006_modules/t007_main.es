@@ -0,0 +1,10 @@
+module t007main
+from .t007_moda import *
+from .t007_modb import *
+
+
+# t007_modd is imported through both modules
+def main() as int32
+{
+	return a() + b() - d(1hh); # needs an implicit cast: duplicate imports of d would make this call ambiguous
+}
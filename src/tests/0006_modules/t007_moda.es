@@ -0,0 +1,7 @@
+module t007moda
+from .t007_modd import *
+
+def a() as int32
+{
+	return d(20);
+}
@@ -0,0 +1,7 @@
+module t007modb
+from .t007_modd import *
+
+def b() as int32
+{
+	return d(-19);
+}
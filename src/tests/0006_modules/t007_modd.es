@@ -0,0 +1,6 @@
+module t007modd
+
+def d(x as int32) as int32
+{
+	return x;
+}
@@ -0,0 +1,83 @@
+/*
+ * The Great Computer Language Shootout
+ * http://shootout.alioth.debian.org/
+ *
+ * binary-trees; sums the checks instead of printing them
+ * C reference for binarytrees.es, returns the same exit code
+ */
+
+#include <stdlib.h>
+
+
+struct node {
+  struct node *left, *right;
+};
+
+
+struct node *bottomUpTree(int depth)
+{
+  struct node *n = malloc(sizeof(struct node));
+
+  if (depth > 0) {
+    n->left = bottomUpTree(depth - 1);
+    n->right = bottomUpTree(depth - 1);
+  } else {
+    n->left = NULL;
+    n->right = NULL;
+  }
+
+  return n;
+}
+
+
+int itemCheck(struct node *n)
+{
+  if (n->left == NULL)
+    return 1;
+  return 1 + itemCheck(n->left) + itemCheck(n->right);
+}
+
+
+void deleteTree(struct node *n)
+{
+  if (n->left != NULL) {
+    deleteTree(n->left);
+    deleteTree(n->right);
+  }
+  free(n);
+}
+
+
+int main(void)
+{
+  int minDepth = 4;
+  int maxDepth = 16;
+  int checksum = 0;
+  int depth, i, iterations, check;
+  struct node *stretchTree, *longLivedTree, *tree;
+
+  stretchTree = bottomUpTree(maxDepth + 1);
+  checksum += itemCheck(stretchTree);
+  deleteTree(stretchTree);
+
+  longLivedTree = bottomUpTree(maxDepth);
+
+  for (depth = minDepth; depth <= maxDepth; depth += 2) {
+    iterations = 1;
+    for (i = 0; i < maxDepth - depth + minDepth; i++)
+      iterations *= 2;
+
+    check = 0;
+    for (i = 0; i < iterations; i++) {
+      tree = bottomUpTree(depth);
+      check += itemCheck(tree);
+      deleteTree(tree);
+    }
+    checksum = (checksum + check) % 1000000;
+  }
+
+  checksum += itemCheck(longLivedTree);
+  deleteTree(longLivedTree);
+
+  return checksum % 128;
+}
@@ -0,0 +1,89 @@
+module binarytrees
+
+from exoself.c.stdlib import *
+
+
+struct Node
+{
+	left, right as Node*;
+}
+
+
+def bottomUpTree(depth as int32) as Node*
+{
+	n = new(Node);
+
+	if depth > 0
+	{
+		n[0].left = bottomUpTree(depth - 1);
+		n[0].right = bottomUpTree(depth - 1);
+	}
+	else
+	{
+		n[0].left = None;
+		n[0].right = None;
+	}
+
+	return n;
+}
+
+
+def itemCheck(n as Node*) as int32
+{
+	if n[0].left == None
+	{
+		return 1;
+	}
+
+	return 1 + itemCheck(n[0].left) + itemCheck(n[0].right);
+}
+
+
+def deleteTree(n as Node*) as void
+{
+	if n[0].left != None
+	{
+		deleteTree(n[0].left);
+		deleteTree(n[0].right);
+	}
+
+	free(cast(n as void*));
+}
+
+
+// sums the checks instead of printing them
+def main() as int32
+{
+	minDepth = 4;
+	maxDepth = 16;
+	checksum = 0;
+
+	stretchTree = bottomUpTree(maxDepth + 1);
+	checksum += itemCheck(stretchTree);
+	deleteTree(stretchTree);
+
+	longLivedTree = bottomUpTree(maxDepth);
+
+	for depth in range(minDepth, maxDepth + 1, 2)
+	{
+		iterations = 1;
+		for i in range(maxDepth - depth + minDepth)
+		{
+			iterations *= 2;
+		}
+
+		check = 0;
+		for i in range(iterations)
+		{
+			tree = bottomUpTree(depth);
+			check += itemCheck(tree);
+			deleteTree(tree);
+		}
+		checksum = (checksum + check) % 1000000;
+	}
+
+	checksum += itemCheck(longLivedTree);
+	deleteTree(longLivedTree);
+
+	return checksum % 128;
+}
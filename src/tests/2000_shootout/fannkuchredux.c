@@ -0,0 +1,95 @@
+/*
+ * The Great Computer Language Shootout
+ * http://shootout.alioth.debian.org/
+ *
+ * fannkuch-redux; C reference for fannkuchredux.es, returns the same exit code
+ */
+
+#include <assert.h>
+#include <stdlib.h>
+
+
+int fannkuch(int n, int *checksumOut)
+{
+  int *perm = malloc(n * sizeof(int));
+  int *perm1 = malloc(n * sizeof(int));
+  int *count = malloc(n * sizeof(int));
+  int maxFlips = 0, checksum = 0, permCount = 0;
+  int r = n;
+  int running = 1;
+  int i, j, k, t, flips, perm0, advanced;
+
+  for (i = 0; i < n; i++)
+    perm1[i] = i;
+
+  while (running) {
+    while (r != 1) {
+      count[r - 1] = r;
+      r -= 1;
+    }
+
+    for (i = 0; i < n; i++)
+      perm[i] = perm1[i];
+
+    flips = 0;
+    k = perm[0];
+    while (k != 0) {
+      i = 0;
+      j = k;
+      while (i < j) {
+        t = perm[i];
+        perm[i] = perm[j];
+        perm[j] = t;
+        i += 1;
+        j -= 1;
+      }
+      flips += 1;
+      k = perm[0];
+    }
+
+    if (flips > maxFlips)
+      maxFlips = flips;
+    if (permCount % 2 == 0)
+      checksum += flips;
+    else
+      checksum -= flips;
+
+    /* next permutation */
+    advanced = 0;
+    while (r != n && !advanced) {
+      perm0 = perm1[0];
+      for (i = 0; i < r; i++)
+        perm1[i] = perm1[i + 1];
+      perm1[r] = perm0;
+
+      count[r] -= 1;
+      if (count[r] > 0)
+        advanced = 1;
+      else
+        r += 1;
+    }
+    if (!advanced)
+      running = 0;
+
+    permCount += 1;
+  }
+
+  free(perm);
+  free(perm1);
+  free(count);
+
+  *checksumOut = checksum;
+  return maxFlips;
+}
+
+
+int main(void)
+{
+  int checksum;
+  int maxFlips = fannkuch(10, &checksum);
+
+  assert(checksum == 73196);
+  assert(maxFlips == 38);
+
+  return (checksum + maxFlips) % 128;
+}
@@ -0,0 +1,114 @@
+module fannkuchredux
+
+from exoself.c.stdlib import *
+
+
+def fannkuch(n as int32, checksumOut as int32*) as int32
+{
+	perm = new(int32, n);
+	perm1 = new(int32, n);
+	count = new(int32, n);
+
+	maxFlips = 0;
+	checksum = 0;
+	permCount = 0;
+	r = n;
+	running = True;
+
+	for i in range(n)
+	{
+		perm1[i] = i;
+	}
+
+	while running
+	{
+		while r != 1
+		{
+			count[r - 1] = r;
+			r -= 1;
+		}
+
+		for i in range(n)
+		{
+			perm[i] = perm1[i];
+		}
+
+		flips = 0;
+		k = perm[0];
+		while k != 0
+		{
+			a = 0;
+			b = k;
+			while a < b
+			{
+				t = perm[a];
+				perm[a] = perm[b];
+				perm[b] = t;
+				a += 1;
+				b -= 1;
+			}
+			flips += 1;
+			k = perm[0];
+		}
+
+		if flips > maxFlips
+		{
+			maxFlips = flips;
+		}
+		if permCount % 2 == 0
+		{
+			checksum += flips;
+		}
+		else
+		{
+			checksum -= flips;
+		}
+
+		// next permutation
+		advanced = False;
+		while r != n and not advanced
+		{
+			perm0 = perm1[0];
+			for i in range(r)
+			{
+				perm1[i] = perm1[i + 1];
+			}
+			perm1[r] = perm0;
+
+			count[r] -= 1;
+			if count[r] > 0
+			{
+				advanced = True;
+			}
+			else
+			{
+				r += 1;
+			}
+		}
+		if not advanced
+		{
+			running = False;
+		}
+
+		permCount += 1;
+	}
+
+	free(cast(perm as void*));
+	free(cast(perm1 as void*));
+	free(cast(count as void*));
+
+	checksumOut[0] = checksum;
+	return maxFlips;
+}
+
+
+def main() as int32
+{
+	checksum as int32;
+	maxFlips = fannkuch(10, &checksum);
+
+	assert checksum == 73196;
+	assert maxFlips == 38;
+
+	return (checksum + maxFlips) % 128;
+}
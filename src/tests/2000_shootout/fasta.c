@@ -0,0 +1,92 @@
+/*
+ * The Great Computer Language Shootout
+ * http://shootout.alioth.debian.org/
+ *
+ * fasta; hashes the generated sequences instead of printing them
+ * C reference for fasta.es, returns the same exit code
+ */
+
+#include <stdlib.h>
+
+
+#define IM 139968
+#define IA 3877
+#define IC 29573
+
+
+double genRandom(int *seed, double max)
+{
+  *seed = (*seed * IA + IC) % IM;
+  return max * (double)*seed / (double)IM;
+}
+
+
+int selectSymbol(double *cumulative, int n, double r)
+{
+  int i = 0;
+  while (i < n - 1 && r >= cumulative[i])
+    i += 1;
+  return i;
+}
+
+
+void makeCumulative(double *probabilities, int n)
+{
+  int i;
+  double p = 0.0;
+
+  for (i = 0; i < n; i++) {
+    p += probabilities[i];
+    probabilities[i] = p;
+  }
+}
+
+
+unsigned hashChar(unsigned checksum, unsigned char c)
+{
+  return (checksum * 31u + c) % 1000003u;
+}
+
+
+unsigned repeatFasta(unsigned checksum, const char *s, int length, int n)
+{
+  int i;
+
+  for (i = 0; i < n; i++)
+    checksum = hashChar(checksum, s[i % length]);
+
+  return checksum;
+}
+
+
+unsigned randomFasta(unsigned checksum, const char *symbols, double *cumulative, int numSymbols, int *seed, int n)
+{
+  int i;
+
+  for (i = 0; i < n; i++)
+    checksum = hashChar(checksum, symbols[selectSymbol(cumulative, numSymbols, genRandom(seed, 1.0))]);
+
+  return checksum;
+}
+
+
+int main(void)
+{
+  const char *alu = "GGCCGGGCGCGGTGGCTCACGCCTGTAATCCCAGCACTTTGGGAGGCCGAGGCGGGCGGATCACCTGAGGTCAGGAGTTCGAGACCAGCCTGGCCAACATGGTGAAACCCCGTCTCTACTAAAAATACAAAAATTAGCCGGGCGTGGTGGCGCGCGCCTGTAATCCCAGCTACTCGGGAGGCTGAGGCAGGAGAATCGCTTGAACCCGGGAGGCGGAGGTTGCAGTGAGCCGAGATCGCGCCACTGCACTCCAGCCTGGGCGACAGAGCGAGACTCCGTCTCAAAAA";
+  const char *iub = "acgtBDHKMNRSVWY";
+  const char *homoSapiens = "acgt";
+  double iubProbabilities[15] = {0.27, 0.12, 0.12, 0.27, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02, 0.02};
+  double homoSapiensProbabilities[4] = {0.3029549426680, 0.1979883004921, 0.1975473066391, 0.3015094502008};
+  int n = 2500000;
+  int seed = 42;
+  unsigned checksum = 0;
+
+  makeCumulative(iubProbabilities, 15);
+  makeCumulative(homoSapiensProbabilities, 4);
+
+  checksum = repeatFasta(checksum, alu, 287, 2 * n);
+  checksum = randomFasta(checksum, iub, iubProbabilities, 15, &seed, 3 * n);
+  checksum = randomFasta(checksum, homoSapiens, homoSapiensProbabilities, 4, &seed, 5 * n);
+
+  return checksum % 128;
+}
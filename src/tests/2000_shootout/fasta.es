@@ -0,0 +1,108 @@
+module fasta
+
+from exoself.c.stdlib import *
+
+
+def genRandom(seed as int32*, max as float64) as float64
+{
+	seed[0] = (seed[0] * 3877 + 29573) % 139968;
+	return max * cast(seed[0] as float64) / 139968.0;
+}
+
+
+def selectSymbol(cumulative as float64*, n as int32, r as float64) as int32
+{
+	i = 0;
+	while i < n - 1 and r >= cumulative[i]
+	{
+		i += 1;
+	}
+	return i;
+}
+
+
+def makeCumulative(probabilities as float64*, n as int32) as void
+{
+	p = 0.0;
+	for i in range(n)
+	{
+		p += probabilities[i];
+		probabilities[i] = p;
+	}
+}
+
+
+def hashChar(checksum as uint32, c as byte) as uint32
+{
+	return (checksum * 31u + cast(c as uint32)) % 1000003u;
+}
+
+
+def repeatFasta(checksum as uint32, s as byte*, length as int32, n as int32) as uint32
+{
+	result = checksum;
+	for i in range(n)
+	{
+		result = hashChar(result, s[i % length]);
+	}
+	return result;
+}
+
+
+def randomFasta(checksum as uint32, symbols as byte*, cumulative as float64*, numSymbols as int32, seed as int32*, n as int32) as uint32
+{
+	result = checksum;
+	for i in range(n)
+	{
+		result = hashChar(result, symbols[selectSymbol(cumulative, numSymbols, genRandom(seed, 1.0))]);
+	}
+	return result;
+}
+
+
+// there is no cast from unsigned to signed integers, yet
+def toInt32(x as uint32) as int32
+{
+	return cast(cast(x as float64) as int32);
+}
+
+
+// hashes the generated sequences instead of printing them
+def main() as int32
+{
+	alu = ar"GGCCGGGCGCGGTGGCTCACGCCTGTAATCCCAGCACTTTGGGAGGCCGAGGCGGGCGGATCACCTGAGGTCAGGAGTTCGAGACCAGCCTGGCCAACATGGTGAAACCCCGTCTCTACTAAAAATACAAAAATTAGCCGGGCGTGGTGGCGCGCGCCTGTAATCCCAGCTACTCGGGAGGCTGAGGCAGGAGAATCGCTTGAACCCGGGAGGCGGAGGTTGCAGTGAGCCGAGATCGCGCCACTGCACTCCAGCCTGGGCGACAGAGCGAGACTCCGTCTCAAAAA";
+	iub = ar"acgtBDHKMNRSVWY";
+	homoSapiens = ar"acgt";
+
+	iubProbabilities = new(float64, 15);
+	iubProbabilities[0] = 0.27;
+	iubProbabilities[1] = 0.12;
+	iubProbabilities[2] = 0.12;
+	iubProbabilities[3] = 0.27;
+	for i in range(4, 15)
+	{
+		iubProbabilities[i] = 0.02;
+	}
+
+	homoSapiensProbabilities = new(float64, 4);
+	homoSapiensProbabilities[0] = 0.3029549426680;
+	homoSapiensProbabilities[1] = 0.1979883004921;
+	homoSapiensProbabilities[2] = 0.1975473066391;
+	homoSapiensProbabilities[3] = 0.3015094502008;
+
+	n = 2500000;
+	seed = 42;
+	checksum = 0u;
+
+	makeCumulative(iubProbabilities, 15);
+	makeCumulative(homoSapiensProbabilities, 4);
+
+	checksum = repeatFasta(checksum, alu, 287, 2 * n);
+	checksum = randomFasta(checksum, iub, iubProbabilities, 15, &seed, 3 * n);
+	checksum = randomFasta(checksum, homoSapiens, homoSapiensProbabilities, 4, &seed, 5 * n);
+
+	free(cast(iubProbabilities as void*));
+	free(cast(homoSapiensProbabilities as void*));
+
+	return toInt32(checksum % 128u);
+}
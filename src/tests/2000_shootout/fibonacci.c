@@ -0,0 +1,38 @@
+/*
+ * recursive fibonacci and ackermann functions; mostly measures calls
+ *
+ * C reference for fibonacci.es, returns the same exit code
+ */
+
+#include <assert.h>
+
+
+int fib(int n)
+{
+  if (n < 2)
+    return n;
+  return fib(n - 1) + fib(n - 2);
+}
+
+
+int ackermann(int m, int n)
+{
+  if (m == 0)
+    return n + 1;
+  else if (n == 0)
+    return ackermann(m - 1, 1);
+  else
+    return ackermann(m - 1, ackermann(m, n - 1));
+}
+
+
+int main(void)
+{
+  int f = fib(35);
+  int a = ackermann(3, 9);
+
+  assert(f == 9227465);
+  assert(a == 4093);
+
+  return (f + a) % 128;
+}
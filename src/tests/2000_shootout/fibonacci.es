@@ -0,0 +1,41 @@
+module fibonacci
+
+
+def fib(n as int32) as int32
+{
+	if n < 2
+	{
+		return n;
+	}
+
+	return fib(n - 1) + fib(n - 2);
+}
+
+
+def ackermann(m as int32, n as int32) as int32
+{
+	if m == 0
+	{
+		return n + 1;
+	}
+	else if n == 0
+	{
+		return ackermann(m - 1, 1);
+	}
+	else
+	{
+		return ackermann(m - 1, ackermann(m, n - 1));
+	}
+}
+
+
+def main() as int32
+{
+	f = fib(35);
+	a = ackermann(3, 9);
+
+	assert f == 9227465;
+	assert a == 4093;
+
+	return (f + a) % 128;
+}
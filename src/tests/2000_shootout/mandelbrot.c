@@ -0,0 +1,49 @@
+/*
+ * The Great Computer Language Shootout
+ * http://shootout.alioth.debian.org/
+ *
+ * mandelbrot; counts the points of the set instead of writing a bitmap
+ * C reference for mandelbrot.es, returns the same exit code
+ */
+
+
+int mandelbrot(int size, int maxIterations)
+{
+  int inside = 0;
+  int x, y, i, escaped;
+  double cr, ci, zr, zi, tr, ti;
+
+  for (y = 0; y < size; y++) {
+    ci = 2.0 * (double)y / (double)size - 1.0;
+
+    for (x = 0; x < size; x++) {
+      cr = 2.0 * (double)x / (double)size - 1.5;
+      zr = 0.0;
+      zi = 0.0;
+
+      i = 0;
+      escaped = 0;
+      while (i < maxIterations && !escaped) {
+        tr = zr * zr - zi * zi + cr;
+        ti = 2.0 * zr * zi + ci;
+        zr = tr;
+        zi = ti;
+
+        if (zr * zr + zi * zi > 4.0)
+          escaped = 1;
+        i += 1;
+      }
+
+      if (!escaped)
+        inside += 1;
+    }
+  }
+
+  return inside;
+}
+
+
+int main(void)
+{
+  return mandelbrot(2000, 50) % 128;
+}
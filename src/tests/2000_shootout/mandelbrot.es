@@ -0,0 +1,49 @@
+module mandelbrot
+
+
+// counts the points of the set instead of writing a bitmap
+def mandelbrot(size as int32, maxIterations as int32) as int32
+{
+	inside = 0;
+
+	for y in range(size)
+	{
+		ci = 2.0 * cast(y as float64) / cast(size as float64) - 1.0;
+
+		for x in range(size)
+		{
+			cr = 2.0 * cast(x as float64) / cast(size as float64) - 1.5;
+			zr = 0.0;
+			zi = 0.0;
+
+			i = 0;
+			escaped = False;
+			while i < maxIterations and not escaped
+			{
+				tr = zr * zr - zi * zi + cr;
+				ti = 2.0 * zr * zi + ci;
+				zr = tr;
+				zi = ti;
+
+				if zr * zr + zi * zi > 4.0
+				{
+					escaped = True;
+				}
+				i += 1;
+			}
+
+			if not escaped
+			{
+				inside += 1;
+			}
+		}
+	}
+
+	return inside;
+}
+
+
+def main() as int32
+{
+	return mandelbrot(2000, 50) % 128;
+}
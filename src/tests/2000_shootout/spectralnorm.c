@@ -0,0 +1,79 @@
+/*
+ * The Great Computer Language Shootout
+ * http://shootout.alioth.debian.org/
+ *
+ * spectral-norm; C reference for spectralnorm.es, returns the same exit code
+ */
+
+#include <math.h>
+#include <stdlib.h>
+
+
+double evalA(int i, int j)
+{
+  return 1.0 / ((i + j) * (i + j + 1) / 2 + i + 1);
+}
+
+
+void multiplyAv(int n, double *v, double *av)
+{
+  int i, j;
+
+  for (i = 0; i < n; i++) {
+    av[i] = 0;
+    for (j = 0; j < n; j++)
+      av[i] += evalA(i, j) * v[j];
+  }
+}
+
+
+void multiplyAtv(int n, double *v, double *atv)
+{
+  int i, j;
+
+  for (i = 0; i < n; i++) {
+    atv[i] = 0;
+    for (j = 0; j < n; j++)
+      atv[i] += evalA(j, i) * v[j];
+  }
+}
+
+
+void multiplyAtAv(int n, double *v, double *atav, double *tmp)
+{
+  multiplyAv(n, v, tmp);
+  multiplyAtv(n, tmp, atav);
+}
+
+
+int main(void)
+{
+  int n = 2000;
+  int i;
+  double *u = malloc(n * sizeof(double));
+  double *v = malloc(n * sizeof(double));
+  double *tmp = malloc(n * sizeof(double));
+  double vBv = 0, vv = 0;
+  double result;
+
+  for (i = 0; i < n; i++)
+    u[i] = 1;
+
+  for (i = 0; i < 10; i++) {
+    multiplyAtAv(n, u, v, tmp);
+    multiplyAtAv(n, v, u, tmp);
+  }
+
+  for (i = 0; i < n; i++) {
+    vBv += u[i] * v[i];
+    vv += v[i] * v[i];
+  }
+
+  result = sqrt(vBv / vv); /* 1.274224153 */
+
+  free(u);
+  free(v);
+  free(tmp);
+
+  return (int)(result * 1000000) % 128;
+}
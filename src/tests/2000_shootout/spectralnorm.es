@@ -0,0 +1,80 @@
+module spectralnorm
+
+from exoself.c.stdlib import *
+from exoself.c.math import *
+
+
+def evalA(i as int32, j as int32) as float64
+{
+	return 1.0 / cast((i + j) * (i + j + 1) / 2 + i + 1 as float64);
+}
+
+
+def multiplyAv(n as int32, v as float64*, av as float64*) as void
+{
+	for i in range(n)
+	{
+		av[i] = 0.0;
+		for j in range(n)
+		{
+			av[i] += evalA(i, j) * v[j];
+		}
+	}
+}
+
+
+def multiplyAtv(n as int32, v as float64*, atv as float64*) as void
+{
+	for i in range(n)
+	{
+		atv[i] = 0.0;
+		for j in range(n)
+		{
+			atv[i] += evalA(j, i) * v[j];
+		}
+	}
+}
+
+
+def multiplyAtAv(n as int32, v as float64*, atav as float64*, tmp as float64*) as void
+{
+	multiplyAv(n, v, tmp);
+	multiplyAtv(n, tmp, atav);
+}
+
+
+def main() as int32
+{
+	n = 2000;
+
+	u = new(float64, n);
+	v = new(float64, n);
+	tmp = new(float64, n);
+
+	for i in range(n)
+	{
+		u[i] = 1.0;
+	}
+
+	for i in range(10)
+	{
+		multiplyAtAv(n, u, v, tmp);
+		multiplyAtAv(n, v, u, tmp);
+	}
+
+	vBv = 0.0;
+	vv = 0.0;
+	for i in range(n)
+	{
+		vBv += u[i] * v[i];
+		vv += v[i] * v[i];
+	}
+
+	result = sqrt(vBv / vv); // 1.274224153
+
+	free(cast(u as void*));
+	free(cast(v as void*));
+	free(cast(tmp as void*));
+
+	return cast(result * 1000000.0 as int32) % 128;
+}
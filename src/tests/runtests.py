@@ -0,0 +1,348 @@
+#!/usr/bin/python
+# 
+# The BSD License
+# 
+# Copyright (c) 2008, Florian Noeding
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+# 
+# Redistributions of source code must retain the above copyright notice, this
+# list of conditions and the following disclaimer.
+# Redistributions in binary form must reproduce the above copyright notice, this
+# list of conditions and the following disclaimer in the documentation and/or
+# other materials provided with the distribution.
+# Neither the name of the of the author nor the names of its contributors may be
+# used to endorse or promote products derived from this software without specific
+# prior written permission.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+# ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+# ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+# 
+
+# runs all tests below src/tests in a pool of worker processes, without waf, llc, gcc or lli
+#
+# The tests are found by executing every wscript_build with a minimal replacement of the waf build context. Every
+# worker keeps the compiler loaded, so the grammar and imported modules are reused by all tests the worker runs. Each
+# test program is run in the JIT of a forked child process, so crashes and endless loops only affect that test.
+# Tests with a .compileerror file next to their source must fail to compile instead.
+#
+# usage: runtests.py [-j JOBS] [--timeout SECONDS] [--json FILE] [--load LIBRARY] [filter ...]
+
+import os
+import sys
+import imp
+import time
+import glob
+import json
+import signal
+import fnmatch
+import tempfile
+import traceback
+import multiprocessing
+from StringIO import StringIO
+from optparse import OptionParser
+
+
+testsDir = os.path.dirname(os.path.abspath(__file__))
+srcDir = os.path.dirname(testsDir)
+compilerDir = os.path.join(srcDir, 'compiler')
+
+# the same search paths as configured by the top level wscript
+searchPaths = [os.path.join(srcDir, 'runtime'), srcDir]
+
+
+
+class _TaskGen(object):
+	''' the attributes of an 'es' task generator which are needed to run its unit test '''
+	def __init__(self, path):
+		self.path = path
+		self.dirs = [path]
+		self.source = ''
+		self.unitTest = None
+		self.uselib_local = ''
+
+
+	def find_sources_in_dirs(self, dirs):
+		self.dirs = [os.path.join(self.path, x) for x in dirs.split()]
+
+
+	def getSources(self):
+		sources = []
+		for x in self.source.split():
+			for d in self.dirs:
+				p = os.path.normpath(os.path.join(d, x))
+				if os.path.exists(p):
+					sources.append(p)
+					break
+			else:
+				raise RuntimeError('file %s was not found (required by %s)' % (x, self.path))
+		return sources
+
+
+
+class _Node(object):
+	def __init__(self, path):
+		self._path = path
+
+
+	def abspath(self):
+		return self._path
+
+
+
+class _BuildContext(object):
+	''' replaces the waf build context while executing a wscript_build '''
+	def __init__(self, path):
+		self.path = _Node(path)
+		self.taskGens = []
+
+
+	def glob(self, pattern):
+		return sorted(fnmatch.filter(os.listdir(self.path.abspath()), pattern))
+
+
+	def new_task_gen(self, *features):
+		tg = _TaskGen(self.path.abspath())
+		if 'es' in features:
+			self.taskGens.append(tg)
+		return tg
+
+
+	def add_group(self):
+		pass
+
+
+
+def findTests():
+	''' returns a list of (name, sources, expected return code or None for compile errors, uses local libraries) '''
+	tests = []
+	for x in sorted(os.listdir(testsDir)):
+		d = os.path.join(testsDir, x)
+
+		p = os.path.join(d, 'wscript_build')
+		if os.path.exists(p):
+			bld = _BuildContext(d)
+			f = file(p, 'rt')
+			try:
+				# waf executes the script with 'file' bound to the script itself
+				exec f in {'bld': bld, 'os': os, 'file': f}
+			finally:
+				f.close()
+
+			for tg in bld.taskGens:
+				if not tg.unitTest:
+					continue
+
+				sources = tg.getSources()
+				name = '%s/%s' % (x, os.path.splitext(os.path.basename(sources[0]))[0])
+				tests.append((name, sources, tg.unitTest.get('ret', 0), bool(tg.uselib_local)))
+
+		for p in sorted(glob.glob(os.path.join(d, '*.compileerror'))):
+			base = os.path.splitext(p)[0]
+			tests.append(('%s/%s' % (x, os.path.basename(base)), [base + '.es'], None, False))
+
+	return tests
+
+
+
+class TestTimeout(Exception):
+	pass
+
+
+def _onAlarm(signum, frame):
+	raise TestTimeout()
+
+
+# state of the worker processes
+_driver = None
+_options = None
+_moduleCache = None
+_workerOptions = None
+
+
+def _initWorker(options):
+	global _driver, _options, _moduleCache, _workerOptions
+
+	_workerOptions = options
+
+	# load the compiler once per worker; setuppaths expects the compiler directory in front of sys.path
+	sys.path.insert(0, compilerDir)
+	_driver = imp.load_source('exoself_driver', os.path.join(compilerDir, 'exoself'))
+
+	# the grammar and the code generator are loaded before the first test
+	import source2ast
+	import typeannotator
+	import ast2llvm
+	import llvm.core
+
+	_options, args = _driver.createOptionParser().parse_args(['-O%d' % options.optLevel, '--run'])
+	_options.searchPaths = list(searchPaths)
+	_moduleCache = _driver.ModuleCache()
+
+	for x in options.libraries:
+		llvm.core.load_library_permanently(x)
+
+	signal.signal(signal.SIGALRM, _onAlarm)
+
+
+def _runProgram(module, timeout):
+	''' runs main of module in a forked child; returns (exit code, output) '''
+	import llvm.core
+	from ast2llvm import run
+
+	output = tempfile.TemporaryFile()
+	sys.stdout.flush()
+	sys.stderr.flush()
+
+	pid = os.fork()
+	if not pid:
+		try:
+			os.dup2(output.fileno(), 1)
+			os.dup2(output.fileno(), 2)
+			signal.signal(signal.SIGALRM, signal.SIG_DFL)
+			signal.alarm(timeout)
+
+			ret = run(module, module.get_function_named('main'))
+			os._exit(ret.as_int_signed() & 0xFF)
+		except:
+			traceback.print_exc()
+			os._exit(255)
+
+	pid, status = os.waitpid(pid, 0)
+	output.seek(0)
+	out = output.read()
+	output.close()
+
+	# same exit codes as the shell used by the waf unit tests
+	if os.WIFSIGNALED(status):
+		return 128 + os.WTERMSIG(status), out
+	return os.WEXITSTATUS(status), out
+
+
+def _runTest(test):
+	''' runs inside a worker process; returns a dict describing the result '''
+	name, sources, expected, usesLibraries = test
+	result = {'name': name, 'expected': expected, 'compileTime': 0.0, 'runTime': 0.0, 'output': ''}
+
+	oldStdout = sys.stdout
+	sys.stdout = StringIO()
+	t = time.time()
+	try:
+		try:
+			signal.alarm(_workerOptions.timeout)
+			try:
+				module = _driver.buildProgram(sources, _options, _moduleCache)
+			finally:
+				signal.alarm(0)
+		except TestTimeout:
+			module = None
+			result['status'] = 'timeout'
+		except Exception:
+			module = None
+			traceback.print_exc(file=sys.stdout)
+			result['status'] = 'error' # the compiler crashed instead of reporting an error
+	finally:
+		result['compileTime'] = time.time() - t
+		result['output'] = sys.stdout.getvalue()
+		sys.stdout = oldStdout
+
+	if 'status' in result:
+		return result
+
+	if expected is None:
+		if module:
+			result['status'] = 'fail'
+			result['actual'] = 'compiled'
+		else:
+			result['status'] = 'pass'
+			result['actual'] = 'compileerror'
+		return result
+	elif not module:
+		result['status'] = 'fail'
+		result['actual'] = 'compileerror'
+		return result
+
+	if usesLibraries and not _workerOptions.libraries:
+		result['status'] = 'skipped' # needs a library built by waf
+		return result
+
+	t = time.time()
+	ret, out = _runProgram(module, _workerOptions.timeout)
+	result['runTime'] = time.time() - t
+	result['output'] += out
+	result['actual'] = ret
+
+	if ret == 128 + signal.SIGALRM and expected != ret:
+		result['status'] = 'timeout'
+	elif ret == expected:
+		result['status'] = 'pass'
+	else:
+		result['status'] = 'fail'
+
+	return result
+
+
+def main():
+	op = OptionParser()
+	op.set_usage('Usage: %prog [options] [filter [...]]; filters are shell patterns like 0006_modules/*')
+	op.add_option('-j', help='number of worker processes', dest='jobs', default=multiprocessing.cpu_count(), type='int')
+	op.add_option('-O', help='optimization level', dest='optLevel', default=1, type='int')
+	op.add_option('--timeout', help='maximum time in seconds for compiling or running a single test', dest='timeout', default=10, type='int')
+	op.add_option('--json', help='write the results to a JSON file', dest='jsonFilename', default=None)
+	op.add_option('--load', help='shared library loaded by the workers, for example the hacks library built by waf; may be specified several times', dest='libraries', action='append', default=[])
+	op.add_option('-v', help='print the output of failed tests', dest='verbose', action='store_true')
+	options, args = op.parse_args()
+
+	if options.jobs < 1:
+		op.error('-j needs a positive number of jobs')
+	options.libraries = [os.path.abspath(x) for x in options.libraries]
+
+	tests = findTests()
+	if args:
+		tests = [x for x in tests if [p for p in args if fnmatch.fnmatch(x[0], p)]]
+
+	t = time.time()
+	pool = multiprocessing.Pool(options.jobs, _initWorker, (options,))
+	try:
+		results = pool.map(_runTest, tests, 1)
+	finally:
+		pool.close()
+		pool.join()
+	totalTime = time.time() - t
+
+	counts = {}
+	for r in results:
+		counts[r['status']] = counts.get(r['status'], 0) + 1
+
+		print '%-8s %-60s %10.1f %10.1f' % (r['status'].upper(), r['name'], r['compileTime'] * 1000, r['runTime'] * 1000)
+		if r['status'] not in ['pass', 'skipped']:
+			print '         expected %s, got %s' % (r['expected'], r.get('actual'))
+			if options.verbose and r['output']:
+				for line in r['output'].rstrip().splitlines():
+					print '         | %s' % line
+
+	print
+	print '%d tests in %.1f s: %s' % (len(results), totalTime, ', '.join(['%d %s' % (counts[x], x) for x in sorted(counts)]))
+
+	if options.jsonFilename:
+		f = file(options.jsonFilename, 'wt')
+		json.dump({'totalTime': totalTime, 'results': results}, f, indent=1)
+		f.close()
+
+	if counts.get('pass', 0) + counts.get('skipped', 0) != len(results):
+		return 1
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
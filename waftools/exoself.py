@@ -18,7 +18,10 @@ def detect(conf):
 		conf.env['EXOSELF_DEBUG'] = ''
 
 
-	conf.env['LLVM_LINK'] = conf.find_program('llvm-link')
+	# optional: socket of a running 'exoself --server'; compile tasks fall back to starting the compiler if it's not reachable
+	conf.env['EXOSELF_SERVER'] = os.environ.get('EXOSELF_SERVER', '')
+
+
 	conf.env['LLVM_LLC'] = conf.find_program('llc')
 	conf.env['LLVM_NATIVE_C'] = conf.find_program('gcc')
 
@@ -26,12 +29,67 @@ def detect(conf):
 
 
 esTask = Task.simple_task_type('exoself', '${EXOSELF} ${EXOSELF_OPTIONS} -c -o ${TGT} ${SRC}', color='BLUE')
-Task.simple_task_type('llvm-link', '${LLVM_LINK} -f -o ${TGT} ${SRC}')
+# modules are linked in-process by the compiler: the bitcode of the target is written only once
+esLinkTask = Task.simple_task_type('exoself-link', '${EXOSELF} --link -O0 ${EXOSELF_LINK_OPTIONS} -o ${TGT} ${SRC}', color='BLUE')
 Task.simple_task_type('llvm-llc', '${LLVM_LLC} ${LLVM_LLC_OPTIONS} -f -o ${TGT} ${SRC}')
 Task.simple_task_type('llvm-native-compile', '${LLVM_NATIVE_C} ${EXOSELF_DEBUG} -c -o ${TGT} ${SRC}')
 
 
 
+_compilerModules = {}
+def _loadCompilerModule(env, name):
+	# load modules directly from the compiler directory; adding that directory to sys.path would shadow modules like 'parser'
+	if name not in _compilerModules:
+		import imp
+		p = os.path.join(os.path.dirname(env['EXOSELF']), name + '.py')
+		_compilerModules[name] = imp.load_source('exoself_' + name, p)
+	return _compilerModules[name]
+
+
+def runExoself(task, argv, runProcess):
+	socketPath = task.env['EXOSELF_SERVER']
+	if socketPath:
+		import socket
+		import sys
+
+		cs = _loadCompilerModule(task.env, 'compileserver')
+		try:
+			status, out, err = cs.compileRemote(socketPath, argv)
+		except socket.error:
+			pass # no server running
+		else:
+			sys.stdout.write(out.encode('utf-8'))
+			sys.stderr.write(err.encode('utf-8'))
+			return status
+
+	return runProcess(task)
+
+
+def runCompile(task):
+	import shlex
+
+	env = task.env
+	argv = shlex.split(env.get_flat('EXOSELF_OPTIONS'))
+	argv.extend(['-c', '-o', task.outputs[0].bldpath(env), task.inputs[0].srcpath(env)])
+	return runExoself(task, argv, runCompileProcess)
+runCompileProcess = esTask.run
+esTask.run = runCompile
+
+
+def runLink(task):
+	import shlex
+
+	env = task.env
+	argv = ['--link', '-O0']
+	argv.extend(shlex.split(env.get_flat('EXOSELF_LINK_OPTIONS')))
+	argv.extend(['-o', task.outputs[0].bldpath(env)])
+	argv.extend([x.bldpath(env) for x in task.inputs])
+	return runExoself(task, argv, runLinkProcess)
+runLinkProcess = esLinkTask.run
+esLinkTask.run = runLink
+
+
+
 class ExoselfUnitTest(Task.Task):
 	def __init__(self, *k, **kw):
 		self.unitTestParams = kw['unitTestParams']
@@ -95,33 +153,16 @@ def scan(self):
 
 	nodes = []
 	names = []
-	seen = []
 
 	assert(len(self.inputs) == 1)
 	node = self.inputs[0]
 	nodePath = os.path.abspath(node.srcpath(self.env))
-	parentNode = node.parent
-
-	absParentPath = os.path.abspath(parentNode.srcpath(self.env))
-
-
-	cmd = '%s --save-dependencies - %s > /dev/null 2> /dev/null' % (self.env['EXOSELF'], nodePath)
-	dependencies = Utils.cmd_output(cmd, silent=True)
-	for dep in dependencies.split():
-		if dep in seen:
-			continue
-		seen.append(dep)
-
-		# TODO handle search paths
-		#for incpath in self.env['EXOSELF_SEARCHPATH']:
-		#	pass
-
-		# FIXME right now works only if the dependency is in the same directory as the original file...
-		depNode = None
-		if dep.startswith(absParentPath):
-			dep = dep[len(absParentPath):]
-			depNode = parentNode.find_resource(dep)
+	root = node.__class__.bld.root
 
+	# only the import statements are read, in-process; every file is scanned at most once per build
+	depscan = _loadCompilerModule(self.env, 'depscan')
+	for dep in depscan.scanDependencies(nodePath, self.env['EXOSELF_SEARCHPATH']):
+		depNode = root.find_resource(dep)
 		if not depNode:
 			names.append(dep)
 		else:
@@ -150,6 +191,8 @@ def apply_source(self):
 	exoselfEnv = self.env.copy()
 	for x in self.env['EXOSELF_SEARCHPATH']:
 		exoselfEnv.append_unique('EXOSELF_OPTIONS', '-I %s' % x)
+	# imported modules are stored as interface files, so each module is only processed once per build
+	exoselfEnv.append_unique('EXOSELF_OPTIONS', '--interface-dir %s' % os.path.join(self.bld.bdir, 'esi'))
 
 
 	# compile .es to .bc
@@ -180,13 +223,19 @@ def apply_source(self):
 			self.bld.add_manual_dependency(outNode, self.bld.ESCompilerHash)
 
 
-	# TODO call opt
-
 	# combine .bc to target
-	if len(self.llvmObjects) > 1:
-		linkTask = self.create_task('llvm-link')
+	# link time optimization needs the whole program: only use it for executables
+	lto = getattr(self, 'lto', False)
+	if len(self.llvmObjects) > 1 or lto:
+		linkEnv = self.env.copy()
+		if lto:
+			linkEnv.append_unique('EXOSELF_LINK_OPTIONS', '--lto')
+
+		linkTask = self.create_task('exoself-link', linkEnv)
 		linkTask.set_inputs(self.llvmObjects)
 		targetNode = self.path.find_or_declare(self.llvmTarget)
+		if targetNode in self.llvmObjects:
+			raise Utils.WafError("llvmTarget '%s' is also the bitcode of a source file (required by '%s')" % (self.llvmTarget, self.name))
 		linkTask.set_outputs(targetNode)
 		for x in compileTasks:
 			linkTask.set_run_after(x)